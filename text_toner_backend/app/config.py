@@ -1,5 +1,5 @@
 import os
-from typing import List
+from typing import FrozenSet
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -9,37 +9,104 @@ class Settings:
     MONGODB_URI: str = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
     MONGODB_DATABASE: str = os.getenv("MONGODB_DATABASE", "tone_analyzer_db")
     
+    # MongoDB connection pool
+    MONGO_MAX_POOL_SIZE: int = int(os.getenv("MONGO_MAX_POOL_SIZE", "200"))
+    MONGO_MIN_POOL_SIZE: int = int(os.getenv("MONGO_MIN_POOL_SIZE", "10"))
+    MONGO_MAX_IDLE_TIME_MS: int = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: int = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "2000"))
+    
+    # Buffering of concurrent message/feedback inserts into bulk writes
+    MESSAGE_INSERT_BATCH_SIZE: int = int(os.getenv("MESSAGE_INSERT_BATCH_SIZE", "100"))
+    MESSAGE_INSERT_MAX_WAIT_MS: float = float(os.getenv("MESSAGE_INSERT_MAX_WAIT_MS", "5"))
+    FEEDBACK_INSERT_BATCH_SIZE: int = int(os.getenv("FEEDBACK_INSERT_BATCH_SIZE", "100"))
+    FEEDBACK_INSERT_MAX_WAIT_MS: float = float(os.getenv("FEEDBACK_INSERT_MAX_WAIT_MS", "5"))
+    
     # Hugging Face Model Configuration
     # Using FLAN-T5 XL for better text generation and tone analysis
     HUGGINGFACE_MODEL: str = os.getenv("HUGGINGFACE_MODEL", "google/flan-t5-xl")
     HUGGINGFACE_TOKEN: str = os.getenv("HUGGINGFACE_TOKEN", "")
     
+    # Shared inference worker (python -m app.inference_worker). When a URL or
+    # unix socket is set the API forwards tone analysis there instead of
+    # loading the model in every API worker
+    INFERENCE_WORKER_URL: str = os.getenv("INFERENCE_WORKER_URL", "")
+    INFERENCE_WORKER_UDS: str = os.getenv("INFERENCE_WORKER_UDS", "")
+    INFERENCE_WORKER_HOST: str = os.getenv("INFERENCE_WORKER_HOST", "127.0.0.1")
+    INFERENCE_WORKER_PORT: int = int(os.getenv("INFERENCE_WORKER_PORT", "8100"))
+    INFERENCE_WORKER_TIMEOUT_SECONDS: float = float(os.getenv("INFERENCE_WORKER_TIMEOUT_SECONDS", "30"))
+    # How often an unready inference worker is probed again
+    INFERENCE_WORKER_HEALTH_RETRY_SECONDS: float = float(os.getenv("INFERENCE_WORKER_HEALTH_RETRY_SECONDS", "5"))
+    
     # Alternative model options (uncomment to use)
     # HUGGINGFACE_MODEL: str = os.getenv("HUGGINGFACE_MODEL", "EleutherAI/gpt-neo-1.3B")
     
     # API Configuration
     API_HOST: str = os.getenv("API_HOST", "0.0.0.0")
     API_PORT: int = int(os.getenv("API_PORT", "8000"))
+    API_TIMEOUT_KEEP_ALIVE: int = int(os.getenv("API_TIMEOUT_KEEP_ALIVE", "30"))
+    API_LIMIT_CONCURRENCY: int = int(os.getenv("API_LIMIT_CONCURRENCY", "1000"))
     DEBUG: bool = os.getenv("DEBUG", "True").lower() == "true"
     
     # Security
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-change-this-in-production")
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+    ARGON2_TIME_COST: int = int(os.getenv("ARGON2_TIME_COST", "2"))
+    ARGON2_MEMORY_COST: int = int(os.getenv("ARGON2_MEMORY_COST", "65536"))
+    ARGON2_PARALLELISM: int = int(os.getenv("ARGON2_PARALLELISM", "1"))
+    AUTH_USER_CACHE_SIZE: int = int(os.getenv("AUTH_USER_CACHE_SIZE", "10000"))
+    AUTH_USER_CACHE_TTL_SECONDS: int = int(os.getenv("AUTH_USER_CACHE_TTL_SECONDS", "30"))
+    AUTH_NEGATIVE_CACHE_SIZE: int = int(os.getenv("AUTH_NEGATIVE_CACHE_SIZE", "1000"))
+    AUTH_NEGATIVE_CACHE_TTL_SECONDS: int = int(os.getenv("AUTH_NEGATIVE_CACHE_TTL_SECONDS", "5"))
     
     # CORS Configuration
-    ALLOWED_ORIGINS: List[str] = [
+    ALLOWED_ORIGINS: FrozenSet[str] = frozenset([
         "http://localhost:3000",
         "http://localhost:8081",
         "http://localhost:19006",  # React Native Expo
         "http://localhost:19000",  # React Native Expo
-    ]
+    ])
+    # Raw header bytes, so the CORS middleware never decodes the Origin header
+    ALLOWED_ORIGIN_BYTES: FrozenSet[bytes] = frozenset(origin.encode("latin-1") for origin in ALLOWED_ORIGINS)
+    # Optional regex for origins outside the fixed set (e.g. preview deployments)
+    ALLOWED_ORIGIN_REGEX: str = os.getenv("ALLOWED_ORIGIN_REGEX", "")
     
     # Tone Analysis Configuration - Updated to emotional tones
     SUPPORTED_TONES = ["sad", "angry", "friendly"]
     
     # Model Configuration
-    MAX_TEXT_LENGTH: int = 512
+    # Prompt length limit in tokens; longer user text is cut at this many tokens
+    MAX_INPUT_TOKENS: int = int(os.getenv("MAX_INPUT_TOKENS", "512"))
     CONFIDENCE_THRESHOLD: float = 0.3
+    
+    # Attention kernel: "sdpa", "flash_attention_2" or "eager"; falls back to the
+    # default when the model or environment doesn't support it
+    ATTN_IMPLEMENTATION: str = os.getenv("ATTN_IMPLEMENTATION", "sdpa")
+    
+    # Weight quantization on GPU: "none", "int8" or "nf4" (requires bitsandbytes),
+    # or "int4" weight-only (requires torchao)
+    QUANTIZATION: str = os.getenv("QUANTIZATION", "none")
+    
+    # Quantize the decoder KV cache during the long rewrite passes (needs a
+    # transformers release with quantized cache support)
+    KV_CACHE_QUANTIZATION: bool = os.getenv("KV_CACHE_QUANTIZATION", "False").lower() == "true"
+    KV_CACHE_NBITS: int = int(os.getenv("KV_CACHE_NBITS", "4"))
+    
+    # Compile the model with torch.compile on GPU (slower startup, faster inference)
+    ENABLE_TORCH_COMPILE: bool = os.getenv("ENABLE_TORCH_COMPILE", "False").lower() == "true"
+    # "reduce-overhead" or "max-autotune" (longer compile, faster kernels)
+    TORCH_COMPILE_MODE: str = os.getenv("TORCH_COMPILE_MODE", "reduce-overhead")
+    
+    # Micro-batching of concurrent tone analysis requests
+    TONE_MAX_BATCH_SIZE: int = int(os.getenv("TONE_MAX_BATCH_SIZE", "8"))
+    TONE_MAX_WAIT_MS: float = float(os.getenv("TONE_MAX_WAIT_MS", "10"))
+    
+    # Number of analyzed texts kept in the in-process result cache
+    TONE_CACHE_SIZE: int = int(os.getenv("TONE_CACHE_SIZE", "4096"))
+    
+    # Detect the tone and rewrite the text in one generate() call. Off by default:
+    # each output the model doesn't format as "TONE: ... TEXT: ..." costs the
+    # two-pass path on top of the fused pass
+    TONE_FUSED_GENERATION: bool = os.getenv("TONE_FUSED_GENERATION", "False").lower() == "true"
 
 settings = Settings()
@@ -1,27 +1,71 @@
-from pymongo import MongoClient
-from pymongo.database import Database
-from pymongo.collection import Collection
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase, AsyncIOMotorCollection
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
 from typing import Optional
+from datetime import datetime
+import asyncio
 from .config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Bump INDEXES_VERSION whenever INDEXES changes so startup rebuilds them once
+INDEXES_VERSION = "indexes_v7"
+SCHEMA_META_COLLECTION = "schema_meta"
+
+INDEXES = {
+    "messages": [
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("user_id", ASCENDING), ("tone_analysis.tone", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("tone_analysis.tone", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("user_id", ASCENDING), ("text", TEXT)]),
+    ],
+    "users": [
+        IndexModel("email", unique=True),
+        IndexModel("username", unique=True),
+    ],
+    "feedback": [
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("message_id", ASCENDING), ("user_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("message_id", ASCENDING), ("created_at", DESCENDING)]),
+    ],
+}
+
+# Indexes created by earlier versions that are now covered by compound indexes,
+# or that served tone queries on a field stored messages don't have
+# (tone_analysis.detected_tone)
+LEGACY_INDEXES = {
+    "messages": (
+        "user_id_1", "timestamp_1", "tone_1",
+        "user_id_1_tone_analysis.detected_tone_1_created_at_-1",
+        "tone_analysis.detected_tone_1_created_at_-1",
+    ),
+    "feedback": ("message_id_1", "user_id_1", "timestamp_1"),
+}
+
 class DatabaseManager:
     def __init__(self):
-        self.client: Optional[MongoClient] = None
-        self.database: Optional[Database] = None
+        self.client: Optional[AsyncIOMotorClient] = None
+        self.database: Optional[AsyncIOMotorDatabase] = None
         
     async def connect(self):
         """Connect to MongoDB database"""
         try:
-            self.client = MongoClient(settings.MONGODB_URI)
+            self.client = AsyncIOMotorClient(
+                settings.MONGODB_URI,
+                maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
+                minPoolSize=settings.MONGO_MIN_POOL_SIZE,
+                maxIdleTimeMS=settings.MONGO_MAX_IDLE_TIME_MS,
+                waitQueueTimeoutMS=settings.MONGO_WAIT_QUEUE_TIMEOUT_MS
+            )
             self.database = self.client[settings.MONGODB_DATABASE]
             
             # Test the connection
-            self.client.admin.command('ping')
+            await self.client.admin.command('ping')
             logger.info("Successfully connected to MongoDB")
             
+            # Warm up the pool so the first requests don't pay for new sockets
+            await self._warm_pool()
+            
             # Create indexes for better performance
             await self._create_indexes()
             
@@ -35,34 +79,53 @@ class DatabaseManager:
             self.client.close()
             logger.info("Disconnected from MongoDB")
     
+    async def _warm_pool(self):
+        """Open minPoolSize connections up front with concurrent pings"""
+        pings = [self.client.admin.command('ping') for _ in range(settings.MONGO_MIN_POOL_SIZE)]
+        await asyncio.gather(*pings)
+        logger.info(f"MongoDB connection pool warmed with {len(pings)} connections")
+    
     async def _create_indexes(self):
         """Create database indexes for better performance"""
         try:
-            # Messages collection indexes
-            messages_collection = self.database.messages
-            messages_collection.create_index("user_id")
-            messages_collection.create_index("timestamp")
-            messages_collection.create_index("tone")
+            schema_meta = self.database[SCHEMA_META_COLLECTION]
+            if await schema_meta.find_one({"_id": INDEXES_VERSION}):
+                logger.info(f"Database indexes already at {INDEXES_VERSION}")
+                return
             
-            # Users collection indexes
-            users_collection = self.database.users
-            users_collection.create_index("email", unique=True)
-            users_collection.create_index("username", unique=True)
+            # One createIndexes command per collection, all collections at once
+            await asyncio.gather(*[
+                self.database[collection_name].create_indexes(indexes)
+                for collection_name, indexes in INDEXES.items()
+            ])
             
-            # Feedback collection indexes
-            feedback_collection = self.database.feedback
-            feedback_collection.create_index("message_id")
-            feedback_collection.create_index("user_id")
-            feedback_collection.create_index("timestamp")
+            # Single-field indexes superseded by the compound indexes
+            await asyncio.gather(*[
+                self._drop_indexes(self.database[collection_name], index_names)
+                for collection_name, index_names in LEGACY_INDEXES.items()
+            ])
             
+            await schema_meta.update_one(
+                {"_id": INDEXES_VERSION},
+                {"$set": {"created_at": datetime.utcnow()}},
+                upsert=True
+            )
             logger.info("Database indexes created successfully")
             
         except Exception as e:
             logger.error(f"Failed to create indexes: {e}")
     
-    def get_collection(self, collection_name: str) -> Collection:
+    async def _drop_indexes(self, collection: AsyncIOMotorCollection, index_names):
+        """Drop the named indexes if they still exist"""
+        existing = await collection.index_information()
+        for index_name in index_names:
+            if index_name in existing:
+                await collection.drop_index(index_name)
+                logger.info(f"Dropped redundant index {collection.name}.{index_name}")
+    
+    def get_collection(self, collection_name: str) -> AsyncIOMotorCollection:
         """Get a MongoDB collection"""
-        if not self.database:
+        if self.database is None:
             raise Exception("Database not connected")
         return self.database[collection_name]
 
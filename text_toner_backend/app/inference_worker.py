@@ -0,0 +1,70 @@
+"""
+Standalone inference worker that owns the tone analysis model.
+
+API processes started with INFERENCE_WORKER_URL / INFERENCE_WORKER_UDS send
+their requests here, so the model is loaded once no matter how many API
+workers run, and concurrent requests from all of them share one batch window.
+
+Run with: python -m app.inference_worker
+"""
+
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from contextlib import asynccontextmanager
+import logging
+
+from .config import settings
+from .models import ToneAnalysisRequest, ToneAnalysisResponse
+from .services.tone_analyzer import ToneAnalyzer
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+# Always the in-process analyzer, even if this process has the client settings
+analyzer = ToneAnalyzer()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load the model before accepting requests"""
+    logger.info("Starting tone inference worker...")
+    await analyzer.load_model()
+    yield
+    await analyzer.close()
+
+app = FastAPI(
+    title="Tone Inference Worker",
+    docs_url=None,
+    redoc_url=None,
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
+)
+
+@app.post("/analyze", response_model=ToneAnalysisResponse)
+async def analyze(request: ToneAnalysisRequest):
+    """Analyze the tone of a text and improve it"""
+    return await analyzer.analyze_tone(request.text)
+
+@app.get("/health")
+async def health():
+    """Report whether the model is loaded"""
+    return {"model_loaded": analyzer.is_loaded}
+
+if __name__ == "__main__":
+    import sys
+    import uvicorn
+
+    # One process only: the point of the worker is a single model copy
+    bind = {"uds": settings.INFERENCE_WORKER_UDS} if settings.INFERENCE_WORKER_UDS else {
+        "host": settings.INFERENCE_WORKER_HOST,
+        "port": settings.INFERENCE_WORKER_PORT
+    }
+    uvicorn.run(
+        app,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        workers=1,
+        **bind
+    )
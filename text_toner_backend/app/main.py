@@ -1,14 +1,17 @@
 from fastapi import FastAPI, HTTPException, status
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response
 from contextlib import asynccontextmanager
+import asyncio
 import logging
+import orjson
+import time
 from datetime import datetime
 
 from .config import settings
 from .database import db_manager
+from .middleware import CORSASGI
 from .services.tone_analyzer import tone_analyzer
-from .routes import auth, tone_analysis, feedback
+from .routes import api_router
 
 # Configure logging
 logging.basicConfig(
@@ -24,12 +27,9 @@ async def lifespan(app: FastAPI):
     logger.info("Starting Tone Analyzer Backend...")
     
     try:
-        # Connect to database
-        await db_manager.connect()
+        # Connect to database and load the tone analysis model concurrently
+        await asyncio.gather(db_manager.connect(), tone_analyzer.load_model())
         logger.info("Database connected successfully")
-        
-        # Load tone analysis model
-        await tone_analyzer.load_model()
         logger.info("Tone analysis model loaded successfully")
         
         logger.info("Application startup completed")
@@ -48,6 +48,8 @@ async def lifespan(app: FastAPI):
         await db_manager.disconnect()
         logger.info("Database disconnected successfully")
         
+        await tone_analyzer.close()
+        
         logger.info("Application shutdown completed")
         
     except Exception as e:
@@ -60,22 +62,52 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
 # Add CORS middleware
 app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.ALLOWED_ORIGINS,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    CORSASGI,
+    origins=settings.ALLOWED_ORIGIN_BYTES,
+    origin_regex=settings.ALLOWED_ORIGIN_REGEX
 )
 
-# Include routers
-app.include_router(auth.router, prefix="/api/v1")
-app.include_router(tone_analysis.router, prefix="/api/v1")
-app.include_router(feedback.router, prefix="/api/v1")
+# Timestamp cache: the ISO string is only rebuilt once per monotonic second
+_clock_bucket = -1
+_clock_iso = ""
+_clock_iso_bytes = b""
+
+def _tick_clock():
+    global _clock_bucket, _clock_iso, _clock_iso_bytes
+    bucket = int(time.monotonic())
+    if bucket != _clock_bucket:
+        _clock_bucket = bucket
+        _clock_iso = datetime.utcnow().isoformat(timespec="seconds")
+        _clock_iso_bytes = _clock_iso.encode()
+
+def _utc_timestamp() -> str:
+    """Current UTC time as an ISO string, at one-second resolution"""
+    _tick_clock()
+    return _clock_iso
+
+def _timestamped_json_prefix(payload: dict) -> bytes:
+    """Serialize a static payload once, leaving the closing timestamp field open"""
+    return orjson.dumps(payload)[:-1] + b',"timestamp":"'
+
+def _timestamped_json_response(prefix: bytes, status_code: int = status.HTTP_200_OK) -> Response:
+    """Finish a pre-encoded payload with the current timestamp"""
+    _tick_clock()
+    return Response(
+        content=prefix + _clock_iso_bytes + b'"}',
+        status_code=status_code,
+        media_type="application/json"
+    )
+
+_INTERNAL_ERROR_JSON = _timestamped_json_prefix({
+    "error": "Internal server error",
+    "detail": "An unexpected error occurred"
+})
 
 # Global exception handler
 @app.exception_handler(Exception)
@@ -83,15 +115,61 @@ async def global_exception_handler(request, exc):
     """Global exception handler"""
     logger.error(f"Unhandled exception: {exc}")
     
-    return JSONResponse(
-        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-        content={
-            "error": "Internal server error",
-            "detail": "An unexpected error occurred",
-            "timestamp": datetime.utcnow().isoformat()
-        }
+    return _timestamped_json_response(
+        _INTERNAL_ERROR_JSON,
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
     )
 
+# Pre-encoded bodies for the static system endpoints
+_HEALTH_JSON = {
+    (db_connected, model_loaded): _timestamped_json_prefix({
+        "status": "healthy" if db_connected and model_loaded else "unhealthy",
+        "database_connected": db_connected,
+        "model_loaded": model_loaded,
+        "version": "1.0.0"
+    })
+    for db_connected in (True, False)
+    for model_loaded in (True, False)
+}
+
+_ROOT_JSON = _timestamped_json_prefix({
+    "message": "Tone Analyzer API",
+    "version": "1.0.0",
+    "description": "A comprehensive API for analyzing text tone and providing improvement suggestions",
+    "docs": "/docs",
+    "health": "/health"
+})
+
+_INFO_JSON = _timestamped_json_prefix({
+    "name": "Tone Analyzer API",
+    "version": "1.0.0",
+    "description": "A comprehensive API for analyzing text tone and providing improvement suggestions",
+    "endpoints": {
+        "authentication": {
+            "register": "POST /api/v1/auth/register",
+            "login": "POST /api/v1/auth/login",
+            "me": "GET /api/v1/auth/me",
+            "change_password": "POST /api/v1/auth/change-password",
+            "deactivate": "DELETE /api/v1/auth/deactivate"
+        },
+        "tone_analysis": {
+            "analyze_tone": "POST /api/v1/tone/analyze-tone",
+            "analyze_tone_batch": "POST /api/v1/tone/analyze-tone-batch",
+            "supported_tones": "GET /api/v1/tone/supported-tones"
+        },
+        "feedback": {
+            "create": "POST /api/v1/feedback/",
+            "get": "GET /api/v1/feedback/{feedback_id}",
+            "get_by_message": "GET /api/v1/feedback/message/{message_id}",
+            "get_user_feedback": "GET /api/v1/feedback/user/me",
+            "update": "PUT /api/v1/feedback/{feedback_id}",
+            "delete": "DELETE /api/v1/feedback/{feedback_id}",
+            "stats": "GET /api/v1/feedback/stats/overall"
+        }
+    },
+    "supported_tones": settings.SUPPORTED_TONES
+})
+
 # Health check endpoint
 @app.get("/health", tags=["Health"])
 async def health_check():
@@ -103,21 +181,15 @@ async def health_check():
         # Check model status
         model_loaded = tone_analyzer.is_loaded
         
-        return {
-            "status": "healthy" if db_connected and model_loaded else "unhealthy",
-            "timestamp": datetime.utcnow().isoformat(),
-            "database_connected": db_connected,
-            "model_loaded": model_loaded,
-            "version": "1.0.0"
-        }
+        return _timestamped_json_response(_HEALTH_JSON[(db_connected, model_loaded)])
         
     except Exception as e:
         logger.error(f"Health check failed: {e}")
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             content={
                 "status": "unhealthy",
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": _utc_timestamp(),
                 "error": str(e)
             }
         )
@@ -126,50 +198,19 @@ async def health_check():
 @app.get("/", tags=["Root"])
 async def root():
     """Root endpoint with API information"""
-    return {
-        "message": "Tone Analyzer API",
-        "version": "1.0.0",
-        "description": "A comprehensive API for analyzing text tone and providing improvement suggestions",
-        "docs": "/docs",
-        "health": "/health",
-        "timestamp": datetime.utcnow().isoformat()
-    }
+    return _timestamped_json_response(_ROOT_JSON)
 
 # API info endpoint
 @app.get("/api/v1/info", tags=["API Info"])
 async def api_info():
     """Get API information and available endpoints"""
-    return {
-        "name": "Tone Analyzer API",
-        "version": "1.0.0",
-        "description": "A comprehensive API for analyzing text tone and providing improvement suggestions",
-        "endpoints": {
-            "authentication": {
-                "register": "POST /api/v1/auth/register",
-                "login": "POST /api/v1/auth/login",
-                "me": "GET /api/v1/auth/me",
-                "change_password": "POST /api/v1/auth/change-password",
-                "deactivate": "DELETE /api/v1/auth/deactivate"
-            },
-            "tone_analysis": {
-                "analyze_tone": "POST /api/v1/tone/analyze-tone",
-                "supported_tones": "GET /api/v1/tone/supported-tones"
-            },
-            "feedback": {
-                "create": "POST /api/v1/feedback/",
-                "get": "GET /api/v1/feedback/{feedback_id}",
-                "get_by_message": "GET /api/v1/feedback/message/{message_id}",
-                "get_user_feedback": "GET /api/v1/feedback/user/me",
-                "update": "PUT /api/v1/feedback/{feedback_id}",
-                "delete": "DELETE /api/v1/feedback/{feedback_id}",
-                "stats": "GET /api/v1/feedback/stats/overall"
-            }
-        },
-        "supported_tones": settings.SUPPORTED_TONES,
-        "timestamp": datetime.utcnow().isoformat()
-    }
+    return _timestamped_json_response(_INFO_JSON)
+
+# Include API routers after the system endpoints so health probes match first
+app.include_router(api_router)
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
     
     uvicorn.run(
@@ -177,5 +218,10 @@ if __name__ == "__main__":
         host=settings.API_HOST,
         port=settings.API_PORT,
         reload=settings.DEBUG,
+        # uvloop is not available on Windows
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        timeout_keep_alive=settings.API_TIMEOUT_KEEP_ALIVE,
+        limit_concurrency=settings.API_LIMIT_CONCURRENCY,
         log_level="info"
     )
@@ -0,0 +1,92 @@
+from typing import FrozenSet, Optional
+import re
+
+# Methods advertised to browsers on preflight (equivalent of allow_methods=["*"])
+ALLOWED_METHODS = b"DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"
+PREFLIGHT_MAX_AGE = b"600"
+
+class CORSASGI:
+    """Pure ASGI CORS middleware.
+
+    Answers preflight requests directly and appends the CORS headers to
+    ``http.response.start`` for everything else, without building Request or
+    Response objects per call.
+    """
+
+    def __init__(self, app, origins: FrozenSet[bytes], origin_regex: Optional[str] = None):
+        self.app = app
+        self.allowed = origins
+        self.origin_regex = re.compile(origin_regex.encode("latin-1")) if origin_regex else None
+
+    def _is_allowed(self, origin: bytes) -> bool:
+        if origin in self.allowed:
+            return True
+        return self.origin_regex is not None and self.origin_regex.fullmatch(origin) is not None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        origin = None
+        request_method = None
+        request_headers = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                request_method = value
+            elif name == b"access-control-request-headers":
+                request_headers = value
+
+        if origin is None:
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] == "OPTIONS" and request_method is not None:
+            await self._preflight(origin, request_headers, send)
+            return
+
+        if not self._is_allowed(origin):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                headers = []
+                vary = b"Origin"
+                for name, value in message.get("headers", []):
+                    if name == b"vary":
+                        vary = value + b", Origin"
+                    else:
+                        headers.append((name, value))
+                headers.append((b"access-control-allow-origin", origin))
+                headers.append((b"access-control-allow-credentials", b"true"))
+                headers.append((b"vary", vary))
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
+
+    async def _preflight(self, origin: bytes, request_headers, send):
+        if self._is_allowed(origin):
+            status = 200
+            body = b"OK"
+            headers = [
+                (b"access-control-allow-origin", origin),
+                (b"access-control-allow-credentials", b"true"),
+                (b"access-control-allow-methods", ALLOWED_METHODS),
+                (b"access-control-max-age", PREFLIGHT_MAX_AGE),
+                (b"vary", b"Origin"),
+            ]
+            if request_headers:
+                headers.append((b"access-control-allow-headers", request_headers))
+        else:
+            status = 400
+            body = b"Disallowed CORS origin"
+            headers = [(b"vary", b"Origin")]
+
+        headers.append((b"content-type", b"text/plain; charset=utf-8"))
+        headers.append((b"content-length", str(len(body)).encode("latin-1")))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, ConfigDict, Field, EmailStr
+from typing import Annotated, List, Optional, Dict, Any
 from datetime import datetime
 from enum import Enum
 
@@ -9,11 +9,11 @@ class ToneType(str, Enum):
     FRIENDLY = "friendly"
 
 class UserBase(BaseModel):
-    username: str = Field(..., min_length=3, max_length=50)
+    username: Annotated[str, Field(min_length=3, max_length=50)]
     email: EmailStr
 
 class UserCreate(UserBase):
-    password: str = Field(..., min_length=8)
+    password: Annotated[str, Field(min_length=8)]
 
 class UserResponse(UserBase):
     id: str
@@ -24,14 +24,20 @@ class UserInDB(UserResponse):
     hashed_password: str
 
 class ToneAnalysisRequest(BaseModel):
-    text: str = Field(..., min_length=1, max_length=2000)
+    text: Annotated[str, Field(min_length=1, max_length=2000)]
 
 class ToneAnalysisResponse(BaseModel):
     tone: str
     improved_text: str
 
+class ToneAnalysisBatchRequest(BaseModel):
+    texts: Annotated[List[Annotated[str, Field(min_length=1, max_length=2000)]], Field(min_length=1, max_length=32)]
+
+class ToneAnalysisBatchResponse(BaseModel):
+    results: List[ToneAnalysisResponse]
+
 class MessageCreate(BaseModel):
-    text: str = Field(..., min_length=1, max_length=1000)
+    text: Annotated[str, Field(min_length=1, max_length=1000)]
     user_id: str
     context: Optional[str] = None
 
@@ -46,8 +52,8 @@ class MessageResponse(BaseModel):
 class FeedbackCreate(BaseModel):
     message_id: str
     user_id: str
-    tone_accuracy: int = Field(..., ge=1, le=5)  # 1-5 scale
-    suggestion_helpfulness: int = Field(..., ge=1, le=5)  # 1-5 scale
+    tone_accuracy: Annotated[int, Field(ge=1, le=5)]  # 1-5 scale
+    suggestion_helpfulness: Annotated[int, Field(ge=1, le=5)]  # 1-5 scale
     comments: Optional[str] = None
 
 class FeedbackResponse(BaseModel):
@@ -60,6 +66,9 @@ class FeedbackResponse(BaseModel):
     created_at: datetime
 
 class HealthCheckResponse(BaseModel):
+    # "model_loaded" is a real field, not part of the pydantic model_ namespace
+    model_config = ConfigDict(protected_namespaces=())
+    
     status: str
     timestamp: datetime
     database_connected: bool
@@ -77,6 +86,14 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     username: Optional[str] = None
+    user_id: Optional[str] = None
+    exp: Optional[int] = None
+
+class UserClaims(BaseModel):
+    """Identity taken straight from a verified access token"""
+    id: str
+    username: str
+    exp: Optional[int] = None
 
 class LoginRequest(BaseModel):
     username: str
@@ -0,0 +1,23 @@
+from typing import AsyncIterator
+from fastapi.responses import Response, StreamingResponse
+import orjson
+
+async def stream_json_array(items: AsyncIterator[dict]) -> Response:
+    """Stream JSON-ready dicts from an async iterator as a JSON array.
+
+    The first item is fetched before the response starts, so a failing query
+    still surfaces as a regular error response instead of a truncated body.
+    """
+    iterator = items.__aiter__()
+    try:
+        first = await iterator.__anext__()
+    except StopAsyncIteration:
+        return Response(content=b"[]", media_type="application/json")
+    
+    async def body():
+        yield b"[" + orjson.dumps(first)
+        async for item in iterator:
+            yield b"," + orjson.dumps(item)
+        yield b"]"
+    
+    return StreamingResponse(body(), media_type="application/json")
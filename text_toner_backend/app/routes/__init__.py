@@ -1 +1,9 @@
 # Routes package
+from fastapi import APIRouter
+from . import auth, tone_analysis, feedback
+
+# All versioned API routes share a single /api/v1 prefix
+api_router = APIRouter(prefix="/api/v1")
+api_router.include_router(auth.router)
+api_router.include_router(tone_analysis.router)
+api_router.include_router(feedback.router)
@@ -3,7 +3,7 @@ from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from typing import Optional
 from ..models import (
     RegisterRequest, UserResponse, LoginRequest, Token, 
-    UserCreate, UserInDB
+    UserCreate, UserInDB, UserClaims
 )
 from ..services.user_service import user_service
 from ..database import db_manager
@@ -12,24 +12,39 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserInDB:
-    """Get current authenticated user"""
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserInDB:
+    """Get current authenticated user"""
     token_data = user_service.verify_token(token)
     if token_data is None:
-        raise credentials_exception
+        raise _credentials_exception()
     
-    user = await user_service.get_user_by_username(token_data.username)
+    user = await user_service.get_user_for_token(token_data)
     if user is None:
-        raise credentials_exception
+        user_service.reject_token(token)
+        raise _credentials_exception()
     
     return user
 
+async def get_current_user_claims(token: str = Depends(oauth2_scheme)) -> UserClaims:
+    """Get the current user's identity from the token alone, without a DB lookup"""
+    token_data = user_service.verify_token(token)
+    if token_data is None:
+        raise _credentials_exception()
+    
+    if token_data.user_id is None:
+        # Tokens issued before the uid claim existed still need the lookup
+        user = await get_current_user(token)
+        return UserClaims(id=user.id, username=user.username, exp=token_data.exp)
+    
+    return UserClaims(id=token_data.user_id, username=token_data.username, exp=token_data.exp)
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(user_data: RegisterRequest):
     """Register a new user"""
@@ -76,7 +91,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
         
         # Create access token
         access_token = user_service.create_access_token(
-            data={"sub": user.username}
+            data={"sub": user.username, "uid": user.id}
         )
         
         return {
@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from typing import List, Optional
 from ..models import (
-    FeedbackCreate, FeedbackResponse, UserInDB
+    FeedbackCreate, FeedbackResponse, UserInDB, UserClaims
 )
 from ..services.feedback_service import feedback_service
-from ..routes.auth import get_current_user
+from ..responses import stream_json_array
+from ..routes.auth import get_current_user, get_current_user_claims
 
 router = APIRouter(prefix="/feedback", tags=["Feedback"])
 
@@ -30,7 +31,7 @@ async def create_feedback(
 @router.get("/{feedback_id}", response_model=FeedbackResponse)
 async def get_feedback(
     feedback_id: str,
-    current_user: UserInDB = Depends(get_current_user)
+    current_user: UserClaims = Depends(get_current_user_claims)
 ):
     """Get a specific feedback by ID"""
     try:
@@ -62,16 +63,14 @@ async def get_feedback(
 @router.get("/message/{message_id}", response_model=List[FeedbackResponse])
 async def get_feedback_by_message(
     message_id: str,
-    current_user: UserInDB = Depends(get_current_user)
+    current_user: UserClaims = Depends(get_current_user_claims)
 ):
     """Get all feedback for a specific message"""
     try:
-        feedback_list = await feedback_service.get_feedback_by_message(message_id)
-        
-        # Filter to only show user's feedback
-        user_feedback = [fb for fb in feedback_list if fb.user_id == current_user.id]
-        
-        return user_feedback
+        # Only the user's own feedback is returned
+        return await stream_json_array(
+            feedback_service.iter_feedback_by_message(message_id, user_id=current_user.id)
+        )
         
     except Exception as e:
         raise HTTPException(
@@ -82,14 +81,13 @@ async def get_feedback_by_message(
 @router.get("/user/me", response_model=List[FeedbackResponse])
 async def get_user_feedback(
     limit: int = Query(50, ge=1, le=100),
-    current_user: UserInDB = Depends(get_current_user)
+    current_user: UserClaims = Depends(get_current_user_claims)
 ):
     """Get feedback submitted by the current user"""
     try:
-        feedback_list = await feedback_service.get_user_feedback(
-            current_user.id, limit=limit
+        return await stream_json_array(
+            feedback_service.iter_user_feedback(current_user.id, limit=limit)
         )
-        return feedback_list
         
     except Exception as e:
         raise HTTPException(
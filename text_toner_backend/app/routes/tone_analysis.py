@@ -1,13 +1,25 @@
 from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import Response
 from typing import List, Optional
-from ..models import ToneAnalysisRequest, ToneAnalysisResponse
+from ..models import ToneAnalysisRequest, ToneAnalysisResponse, ToneAnalysisBatchRequest, ToneAnalysisBatchResponse
 from ..services.tone_analyzer import tone_analyzer
+from ..config import settings
+import asyncio
 import logging
+import orjson
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/tone", tags=["Tone Analysis"])
 
+# The supported tones never change at runtime, so encode them once
+_SUPPORTED_TONES_JSON = orjson.dumps({
+    "supported_tones": settings.SUPPORTED_TONES,
+    "description": "Available tone types for analysis: sad, angry, friendly"
+})
+# Fixed until the next deploy, so clients and proxies may reuse it for a while
+_SUPPORTED_TONES_HEADERS = {"Cache-Control": "public, max-age=3600"}
+
 @router.post("/analyze-tone", response_model=ToneAnalysisResponse)
 async def analyze_tone(request: ToneAnalysisRequest):
     """
@@ -46,12 +58,44 @@ async def analyze_tone(request: ToneAnalysisRequest):
             detail=f"Failed to analyze tone: {str(e)}"
         )
 
+@router.post("/analyze-tone-batch", response_model=ToneAnalysisBatchResponse)
+async def analyze_tone_batch(request: ToneAnalysisBatchRequest):
+    """
+    Analyze the tone of several texts in one request
+    
+    Input:
+    {
+        "texts": ["<user_input_text>", ...]
+    }
+    
+    Output:
+    {
+        "results": [{"tone": "<detected_tone>", "improved_text": "<improved_text>"}, ...]
+    }
+    """
+    try:
+        logger.info(f"Analyzing tone for {len(request.texts)} texts")
+        
+        # Submitted together, so the analyzer runs them in shared batched passes
+        results = await asyncio.gather(*(tone_analyzer.analyze_tone(text) for text in request.texts))
+        
+        return ToneAnalysisBatchResponse(
+            results=[
+                ToneAnalysisResponse(tone=result["tone"], improved_text=result["improved_text"])
+                for result in results
+            ]
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to analyze tone batch: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to analyze tone: {str(e)}"
+        )
+
 @router.get("/supported-tones")
 async def get_supported_tones():
     """Get list of supported tone types"""
-    from ..config import settings
-    
-    return {
-        "supported_tones": settings.SUPPORTED_TONES,
-        "description": "Available tone types for analysis: sad, angry, friendly"
-    }
\ No newline at end of file
+    return Response(content=_SUPPORTED_TONES_JSON, media_type="application/json", headers=_SUPPORTED_TONES_HEADERS)
\ No newline at end of file
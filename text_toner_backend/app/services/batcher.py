@@ -0,0 +1,136 @@
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+import asyncio
+import logging
+from pymongo import InsertOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, WriteConcernError, WriteError
+
+logger = logging.getLogger(__name__)
+
+# Write error codes insert_one raises as DuplicateKeyError
+DUPLICATE_KEY_CODES = frozenset((11000, 11001, 12582))
+
+class MicroBatcher:
+    """Coalesce concurrent single-item calls into batched handler calls.
+
+    Callers ``await submit(item)``; a background task collects items until
+    ``max_batch_size`` is reached or ``max_wait_ms`` has passed since the first
+    item arrived, then calls ``handler(items)`` once and hands each caller its
+    own result. The handler must return one result per item, in order.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_batch_size: int,
+        max_wait_ms: float
+    ):
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_worker(self):
+        # The queue and worker belong to one event loop; rebuild them if the
+        # running loop changed (e.g. a new loop per test)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, item: Any) -> Any:
+        """Queue an item and wait for its result"""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[Any, asyncio.Future]]:
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            # Callers that gave up (cancelled) no longer need a result
+            batch = [(item, future) for item, future in batch if not future.done()]
+            if not batch:
+                continue
+            try:
+                results = await self.handler([item for item, _ in batch])
+            except Exception as e:
+                logger.error(f"Batch of {len(batch)} failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def close(self):
+        """Stop the background worker"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+class BulkInserter:
+    """Insert documents, coalescing concurrent inserts into one unordered bulk_write.
+
+    An insert that arrives while none is in flight goes straight to insert_one,
+    so low load pays no batching delay. Documents should carry their own _id.
+    A write error is raised only in the caller whose document failed, as the
+    same exception type insert_one would raise; a write concern error applies
+    to the whole batch and is raised in every caller.
+    """
+
+    def __init__(self, get_collection: Callable[[], Any], max_batch_size: int, max_wait_ms: float):
+        self._get_collection = get_collection
+        self._batcher = MicroBatcher(self._write_batch, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+        self._in_flight = 0
+
+    async def _write_batch(self, docs: List[dict]) -> List[Optional[WriteError]]:
+        errors = [None] * len(docs)
+        try:
+            await self._get_collection().bulk_write([InsertOne(doc) for doc in docs], ordered=False)
+        except BulkWriteError as e:
+            concern_errors = e.details.get("writeConcernErrors")
+            if concern_errors:
+                error = concern_errors[0]
+                raise WriteConcernError(error.get("errmsg"), error.get("code"), error) from e
+            for error in e.details.get("writeErrors", []):
+                error_class = DuplicateKeyError if error.get("code") in DUPLICATE_KEY_CODES else WriteError
+                errors[error["index"]] = error_class(error.get("errmsg"), error.get("code"), error)
+        return errors
+
+    async def insert(self, doc: dict):
+        """Insert one document"""
+        self._in_flight += 1
+        try:
+            if self._in_flight == 1:
+                # Nothing to coalesce with
+                await self._get_collection().insert_one(doc)
+                return
+            error = await self._batcher.submit(doc)
+        finally:
+            self._in_flight -= 1
+        if error is not None:
+            raise error
@@ -1,15 +1,34 @@
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 from datetime import datetime
 from bson import ObjectId
+from pymongo import ReturnDocument
 import logging
+from ..config import settings
 from ..database import db_manager
 from ..models import FeedbackCreate, FeedbackResponse
+from .batcher import BulkInserter
 
 logger = logging.getLogger(__name__)
 
+# Fields needed to build a FeedbackResponse
+FEEDBACK_PROJECTION = {
+    "message_id": 1,
+    "user_id": 1,
+    "tone_accuracy": 1,
+    "suggestion_helpfulness": 1,
+    "comments": 1,
+    "created_at": 1
+}
+
 class FeedbackService:
     def __init__(self):
         self.collection_name = "feedback"
+        # Inserts that arrive while another one is in flight share one bulk_write
+        self._inserter = BulkInserter(
+            self._get_collection,
+            max_batch_size=settings.FEEDBACK_INSERT_BATCH_SIZE,
+            max_wait_ms=settings.FEEDBACK_INSERT_MAX_WAIT_MS
+        )
     
     def _get_collection(self):
         return db_manager.get_collection(self.collection_name)
@@ -19,6 +38,7 @@ class FeedbackService:
         try:
             # Prepare feedback document
             feedback_doc = {
+                "_id": ObjectId(),
                 "message_id": feedback_data.message_id,
                 "user_id": feedback_data.user_id,
                 "tone_accuracy": feedback_data.tone_accuracy,
@@ -28,12 +48,11 @@ class FeedbackService:
             }
             
             # Insert into database
-            collection = self._get_collection()
-            result = collection.insert_one(feedback_doc)
+            await self._inserter.insert(feedback_doc)
             
             # Create response
             feedback_response = FeedbackResponse(
-                id=str(result.inserted_id),
+                id=str(feedback_doc["_id"]),
                 message_id=feedback_data.message_id,
                 user_id=feedback_data.user_id,
                 tone_accuracy=feedback_data.tone_accuracy,
@@ -42,7 +61,7 @@ class FeedbackService:
                 created_at=feedback_doc["created_at"]
             )
             
-            logger.info(f"Feedback created successfully: {result.inserted_id}")
+            logger.info(f"Feedback created successfully: {feedback_doc['_id']}")
             return feedback_response
             
         except Exception as e:
@@ -53,106 +72,107 @@ class FeedbackService:
         """Get feedback by ID"""
         try:
             collection = self._get_collection()
-            feedback_doc = collection.find_one({"_id": ObjectId(feedback_id)})
+            feedback_doc = await collection.find_one({"_id": ObjectId(feedback_id)}, projection=FEEDBACK_PROJECTION)
             
             if not feedback_doc:
                 return None
             
-            return FeedbackResponse(
-                id=str(feedback_doc["_id"]),
-                message_id=feedback_doc["message_id"],
-                user_id=feedback_doc["user_id"],
-                tone_accuracy=feedback_doc["tone_accuracy"],
-                suggestion_helpfulness=feedback_doc["suggestion_helpfulness"],
-                comments=feedback_doc["comments"],
-                created_at=feedback_doc["created_at"]
-            )
+            return FeedbackResponse(**self._to_feedback_dict(feedback_doc))
             
         except Exception as e:
             logger.error(f"Failed to get feedback: {e}")
             raise
     
-    async def get_feedback_by_message(self, message_id: str) -> List[FeedbackResponse]:
-        """Get all feedback for a specific message"""
+    def _to_feedback_dict(self, feedback_doc: dict) -> dict:
+        """Convert a feedback document into FeedbackResponse fields"""
+        return {
+            "id": str(feedback_doc["_id"]),
+            "message_id": feedback_doc["message_id"],
+            "user_id": feedback_doc["user_id"],
+            "tone_accuracy": feedback_doc["tone_accuracy"],
+            "suggestion_helpfulness": feedback_doc["suggestion_helpfulness"],
+            "comments": feedback_doc["comments"],
+            "created_at": feedback_doc["created_at"]
+        }
+    
+    async def iter_feedback_by_message(self, message_id: str, user_id: Optional[str] = None) -> AsyncIterator[dict]:
+        """Stream feedback for a specific message, optionally limited to one user"""
         try:
             collection = self._get_collection()
-            cursor = collection.find({"message_id": message_id}).sort("created_at", -1)
-            
-            feedback_list = []
-            for feedback_doc in cursor:
-                feedback = FeedbackResponse(
-                    id=str(feedback_doc["_id"]),
-                    message_id=feedback_doc["message_id"],
-                    user_id=feedback_doc["user_id"],
-                    tone_accuracy=feedback_doc["tone_accuracy"],
-                    suggestion_helpfulness=feedback_doc["suggestion_helpfulness"],
-                    comments=feedback_doc["comments"],
-                    created_at=feedback_doc["created_at"]
-                )
-                feedback_list.append(feedback)
-            
-            return feedback_list
+            query = {"message_id": message_id}
+            if user_id is not None:
+                query["user_id"] = user_id
+            
+            cursor = collection.find(query, projection=FEEDBACK_PROJECTION).sort("created_at", -1)
+            async for feedback_doc in cursor:
+                yield self._to_feedback_dict(feedback_doc)
             
         except Exception as e:
             logger.error(f"Failed to get feedback by message: {e}")
             raise
     
-    async def get_user_feedback(self, user_id: str, limit: int = 50) -> List[FeedbackResponse]:
-        """Get feedback submitted by a specific user"""
+    async def get_feedback_by_message(self, message_id: str, user_id: Optional[str] = None) -> List[FeedbackResponse]:
+        """Get all feedback for a specific message, optionally limited to one user"""
+        return [
+            FeedbackResponse(**feedback)
+            async for feedback in self.iter_feedback_by_message(message_id, user_id=user_id)
+        ]
+    
+    async def iter_user_feedback(self, user_id: str, limit: int = 50) -> AsyncIterator[dict]:
+        """Stream feedback submitted by a specific user"""
         try:
             collection = self._get_collection()
-            cursor = collection.find({"user_id": user_id}).sort("created_at", -1).limit(limit)
-            
-            feedback_list = []
-            for feedback_doc in cursor:
-                feedback = FeedbackResponse(
-                    id=str(feedback_doc["_id"]),
-                    message_id=feedback_doc["message_id"],
-                    user_id=feedback_doc["user_id"],
-                    tone_accuracy=feedback_doc["tone_accuracy"],
-                    suggestion_helpfulness=feedback_doc["suggestion_helpfulness"],
-                    comments=feedback_doc["comments"],
-                    created_at=feedback_doc["created_at"]
-                )
-                feedback_list.append(feedback)
-            
-            return feedback_list
+            cursor = collection.find({"user_id": user_id}, projection=FEEDBACK_PROJECTION).sort("created_at", -1).limit(limit).batch_size(limit)
+            async for feedback_doc in cursor:
+                yield self._to_feedback_dict(feedback_doc)
             
         except Exception as e:
             logger.error(f"Failed to get user feedback: {e}")
             raise
     
+    async def get_user_feedback(self, user_id: str, limit: int = 50) -> List[FeedbackResponse]:
+        """Get feedback submitted by a specific user"""
+        return [
+            FeedbackResponse(**feedback)
+            async for feedback in self.iter_user_feedback(user_id, limit=limit)
+        ]
+    
     async def get_feedback_stats(self) -> dict:
         """Get overall feedback statistics"""
         try:
             collection = self._get_collection()
             
-            # Total feedback count
-            total_feedback = collection.count_documents({})
-            
-            # Average tone accuracy
+            # Totals, averages and both rating histograms in a single pass
             pipeline = [
-                {"$group": {
-                    "_id": None,
-                    "avg_tone_accuracy": {"$avg": "$tone_accuracy"},
-                    "avg_suggestion_helpfulness": {"$avg": "$suggestion_helpfulness"}
+                {"$facet": {
+                    "summary": [
+                        {"$group": {
+                            "_id": None,
+                            "total": {"$sum": 1},
+                            "avg_tone_accuracy": {"$avg": "$tone_accuracy"},
+                            "avg_suggestion_helpfulness": {"$avg": "$suggestion_helpfulness"}
+                        }}
+                    ],
+                    "tone_accuracy": [
+                        {"$group": {"_id": "$tone_accuracy", "count": {"$sum": 1}}}
+                    ],
+                    "suggestion_helpfulness": [
+                        {"$group": {"_id": "$suggestion_helpfulness", "count": {"$sum": 1}}}
+                    ]
                 }}
             ]
             
-            stats_result = list(collection.aggregate(pipeline))
-            avg_tone_accuracy = stats_result[0]["avg_tone_accuracy"] if stats_result else 0.0
-            avg_suggestion_helpfulness = stats_result[0]["avg_suggestion_helpfulness"] if stats_result else 0.0
+            stats_result = (await collection.aggregate(pipeline).to_list(length=1))[0]
+            summary = stats_result["summary"][0] if stats_result["summary"] else {}
+            total_feedback = summary.get("total", 0)
+            avg_tone_accuracy = summary.get("avg_tone_accuracy", 0.0)
+            avg_suggestion_helpfulness = summary.get("avg_suggestion_helpfulness", 0.0)
             
             # Feedback distribution by rating
-            tone_accuracy_distribution = {}
-            suggestion_helpfulness_distribution = {}
-            
-            for rating in range(1, 6):
-                tone_count = collection.count_documents({"tone_accuracy": rating})
-                suggestion_count = collection.count_documents({"suggestion_helpfulness": rating})
-                
-                tone_accuracy_distribution[str(rating)] = tone_count
-                suggestion_helpfulness_distribution[str(rating)] = suggestion_count
+            tone_counts = {bucket["_id"]: bucket["count"] for bucket in stats_result["tone_accuracy"]}
+            suggestion_counts = {bucket["_id"]: bucket["count"] for bucket in stats_result["suggestion_helpfulness"]}
+            tone_accuracy_distribution = {str(rating): tone_counts.get(rating, 0) for rating in range(1, 6)}
+            suggestion_helpfulness_distribution = {str(rating): suggestion_counts.get(rating, 0) for rating in range(1, 6)}
             
             return {
                 "total_feedback": total_feedback,
@@ -177,19 +197,21 @@ class FeedbackService:
             update_data.pop("_id", None)
             update_data["updated_at"] = datetime.utcnow()
             
-            result = collection.update_one(
+            # Update and read back the owner's document in one round-trip
+            feedback_doc = await collection.find_one_and_update(
                 {
                     "_id": ObjectId(feedback_id),
                     "user_id": user_id
                 },
-                {"$set": update_data}
+                {"$set": update_data},
+                projection=FEEDBACK_PROJECTION,
+                return_document=ReturnDocument.AFTER
             )
             
-            if result.modified_count == 0:
+            if not feedback_doc:
                 return None
             
-            # Return updated feedback
-            return await self.get_feedback(feedback_id)
+            return FeedbackResponse(**self._to_feedback_dict(feedback_doc))
             
         except Exception as e:
             logger.error(f"Failed to update feedback: {e}")
@@ -199,7 +221,7 @@ class FeedbackService:
         """Delete feedback (only by the owner)"""
         try:
             collection = self._get_collection()
-            result = collection.delete_one({
+            result = await collection.delete_one({
                 "_id": ObjectId(feedback_id),
                 "user_id": user_id
             })
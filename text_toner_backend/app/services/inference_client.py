@@ -0,0 +1,106 @@
+from typing import Dict, Optional
+import asyncio
+import logging
+import httpx
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+class RemoteToneAnalyzer:
+    """Drop-in replacement for ToneAnalyzer that forwards to the inference worker.
+
+    Used when INFERENCE_WORKER_URL or INFERENCE_WORKER_UDS is set, so every API
+    worker shares the one model copy (and batch window) held by
+    ``app.inference_worker`` instead of loading its own.
+
+    Errors match the in-process analyzer: a model failure inside the worker
+    still comes back as its fallback response, while an unreachable or
+    unready worker raises, as a local analyzer without a model does.
+    """
+
+    def __init__(self, base_url: str, uds: str = "", transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = base_url
+        self.uds = uds
+        self.is_loaded = False
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._health_task: Optional[asyncio.Task] = None
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        # httpx clients are bound to the loop they were first used on
+        loop = asyncio.get_running_loop()
+        if self._client is not None and self._loop is not loop:
+            stale, self._client = self._client, None
+            try:
+                await stale.aclose()
+            except Exception as e:
+                # Its connections belong to a loop that may already be closed
+                logger.info(f"Could not cleanly close the previous inference worker client: {e}")
+        if self._client is None:
+            transport = self._transport
+            if transport is None and self.uds:
+                transport = httpx.AsyncHTTPTransport(uds=self.uds)
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                transport=transport,
+                timeout=settings.INFERENCE_WORKER_TIMEOUT_SECONDS
+            )
+            self._loop = loop
+        return self._client
+
+    async def _probe(self) -> bool:
+        """Ask the worker whether its model is loaded and record the answer"""
+        try:
+            response = await (await self._get_client()).get("/health")
+            response.raise_for_status()
+            self.is_loaded = response.json().get("model_loaded", False)
+        except Exception as e:
+            logger.error(f"Inference worker unavailable: {e}")
+            self.is_loaded = False
+        return self.is_loaded
+
+    async def _retry_probe(self):
+        while not await self._probe():
+            await asyncio.sleep(settings.INFERENCE_WORKER_HEALTH_RETRY_SECONDS)
+        logger.info(f"Inference worker at {self.uds or self.base_url} is ready")
+
+    def _watch_health(self):
+        """Keep probing in the background until the worker reports ready"""
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.get_running_loop().create_task(self._retry_probe())
+
+    async def load_model(self):
+        """Check that the inference worker is up and has its model loaded"""
+        await self._probe()
+        logger.info(f"Inference worker at {self.uds or self.base_url} model_loaded={self.is_loaded}")
+        if not self.is_loaded:
+            # Otherwise /health would stay unhealthy until a request happened to succeed
+            self._watch_health()
+
+    async def analyze_tone(self, text: str) -> Dict[str, str]:
+        """Analyze text tone and improve it in the inference worker"""
+        try:
+            response = await (await self._get_client()).post("/analyze", json={"text": text})
+            response.raise_for_status()
+        except Exception as e:
+            logger.error(f"Error in remote tone analysis: {e}")
+            self.is_loaded = False
+            self._watch_health()
+            raise RuntimeError(f"Inference worker unavailable: {e}") from e
+
+        self.is_loaded = True
+        return response.json()
+
+    async def close(self):
+        """Stop health probing and close the connection pool to the inference worker"""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
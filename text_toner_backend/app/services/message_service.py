@@ -2,42 +2,71 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 from bson import ObjectId
 import logging
+from ..config import settings
 from ..database import db_manager
 from ..models import MessageCreate, MessageResponse, ToneAnalysisResponse, UserStatsResponse
+from .batcher import BulkInserter
 from .tone_analyzer import tone_analyzer
 
 logger = logging.getLogger(__name__)
 
+# Fields needed to build a MessageResponse
+MESSAGE_PROJECTION = {
+    "text": 1,
+    "user_id": 1,
+    "tone_analysis": 1,
+    "created_at": 1,
+    "updated_at": 1
+}
+
 class MessageService:
     def __init__(self):
         self.collection_name = "messages"
+        # Inserts that arrive while another one is in flight share one bulk_write
+        self._inserter = BulkInserter(
+            self._get_collection,
+            max_batch_size=settings.MESSAGE_INSERT_BATCH_SIZE,
+            max_wait_ms=settings.MESSAGE_INSERT_MAX_WAIT_MS
+        )
     
     def _get_collection(self):
         return db_manager.get_collection(self.collection_name)
     
+    def _to_message_response(self, message_doc: dict) -> MessageResponse:
+        """Build a MessageResponse from a stored document"""
+        return MessageResponse(
+            id=str(message_doc["_id"]),
+            text=message_doc["text"],
+            user_id=message_doc["user_id"],
+            tone_analysis=ToneAnalysisResponse(**message_doc["tone_analysis"]),
+            created_at=message_doc["created_at"],
+            updated_at=message_doc["updated_at"]
+        )
+    
     async def create_message(self, message_data: MessageCreate) -> MessageResponse:
         """Create a new message with tone analysis"""
         try:
             # Analyze tone
-            tone_analysis = await tone_analyzer.analyze_tone(message_data.text)
+            tone_analysis = ToneAnalysisResponse(**await tone_analyzer.analyze_tone(message_data.text))
             
-            # Prepare message document
+            # Prepare message document; the id is assigned here so batched inserts
+            # don't need inserted_ids mapped back
             message_doc = {
+                "_id": ObjectId(),
                 "text": message_data.text,
                 "user_id": message_data.user_id,
                 "context": message_data.context,
-                "tone_analysis": tone_analysis.dict(),
+                "tone_analysis": tone_analysis.model_dump(),
                 "created_at": datetime.utcnow(),
                 "updated_at": datetime.utcnow()
             }
             
             # Insert into database
-            collection = self._get_collection()
-            result = collection.insert_one(message_doc)
+            await self._inserter.insert(message_doc)
             
             # Create response
             message_response = MessageResponse(
-                id=str(result.inserted_id),
+                id=str(message_doc["_id"]),
                 text=message_data.text,
                 user_id=message_data.user_id,
                 tone_analysis=tone_analysis,
@@ -45,7 +74,7 @@ class MessageService:
                 updated_at=message_doc["updated_at"]
             )
             
-            logger.info(f"Message created successfully: {result.inserted_id}")
+            logger.info(f"Message created successfully: {message_doc['_id']}")
             return message_response
             
         except Exception as e:
@@ -56,19 +85,12 @@ class MessageService:
         """Get a message by ID"""
         try:
             collection = self._get_collection()
-            message_doc = collection.find_one({"_id": ObjectId(message_id)})
+            message_doc = await collection.find_one({"_id": ObjectId(message_id)}, projection=MESSAGE_PROJECTION)
             
             if not message_doc:
                 return None
             
-            return MessageResponse(
-                id=str(message_doc["_id"]),
-                text=message_doc["text"],
-                user_id=message_doc["user_id"],
-                tone_analysis=ToneAnalysisResponse(**message_doc["tone_analysis"]),
-                created_at=message_doc["created_at"],
-                updated_at=message_doc["updated_at"]
-            )
+            return self._to_message_response(message_doc)
             
         except Exception as e:
             logger.error(f"Failed to get message: {e}")
@@ -79,22 +101,13 @@ class MessageService:
         try:
             collection = self._get_collection()
             cursor = collection.find(
-                {"user_id": user_id}
-            ).sort("created_at", -1).skip(skip).limit(limit)
-            
-            messages = []
-            for message_doc in cursor:
-                message = MessageResponse(
-                    id=str(message_doc["_id"]),
-                    text=message_doc["text"],
-                    user_id=message_doc["user_id"],
-                    tone_analysis=ToneAnalysisResponse(**message_doc["tone_analysis"]),
-                    created_at=message_doc["created_at"],
-                    updated_at=message_doc["updated_at"]
-                )
-                messages.append(message)
-            
-            return messages
+                {"user_id": user_id},
+                projection=MESSAGE_PROJECTION
+            ).sort("created_at", -1).skip(skip).limit(limit).batch_size(limit)
+            
+            # The whole page comes back in the first batch
+            message_docs = await cursor.to_list(length=limit)
+            return [self._to_message_response(message_doc) for message_doc in message_docs]
             
         except Exception as e:
             logger.error(f"Failed to get user messages: {e}")
@@ -105,82 +118,85 @@ class MessageService:
         try:
             collection = self._get_collection()
             cursor = collection.find(
-                {"tone_analysis.detected_tone": tone}
-            ).sort("created_at", -1).limit(limit)
-            
-            messages = []
-            for message_doc in cursor:
-                message = MessageResponse(
-                    id=str(message_doc["_id"]),
-                    text=message_doc["text"],
-                    user_id=message_doc["user_id"],
-                    tone_analysis=ToneAnalysisResponse(**message_doc["tone_analysis"]),
-                    created_at=message_doc["created_at"],
-                    updated_at=message_doc["updated_at"]
-                )
-                messages.append(message)
-            
-            return messages
+                {"tone_analysis.tone": tone},
+                projection=MESSAGE_PROJECTION
+            ).sort("created_at", -1).limit(limit).batch_size(limit)
+            
+            # The whole page comes back in the first batch
+            message_docs = await cursor.to_list(length=limit)
+            return [self._to_message_response(message_doc) for message_doc in message_docs]
             
         except Exception as e:
             logger.error(f"Failed to get messages by tone: {e}")
             raise
     
+    async def get_messages_by_tone_for_user(self, user_id: str, tone: str, limit: int = 50) -> List[MessageResponse]:
+        """Get a user's messages filtered by tone"""
+        try:
+            collection = self._get_collection()
+            cursor = collection.find(
+                {"user_id": user_id, "tone_analysis.tone": tone},
+                projection=MESSAGE_PROJECTION
+            ).sort("created_at", -1).limit(limit).batch_size(limit)
+            
+            # The whole page comes back in the first batch
+            message_docs = await cursor.to_list(length=limit)
+            return [self._to_message_response(message_doc) for message_doc in message_docs]
+            
+        except Exception as e:
+            logger.error(f"Failed to get user messages by tone: {e}")
+            raise
+    
     async def get_user_stats(self, user_id: str) -> UserStatsResponse:
         """Get statistics for a user"""
         try:
             collection = self._get_collection()
             
-            # Total messages
-            total_messages = collection.count_documents({"user_id": user_id})
-            
-            # Messages this week
             week_ago = datetime.utcnow() - timedelta(days=7)
-            messages_this_week = collection.count_documents({
-                "user_id": user_id,
-                "created_at": {"$gte": week_ago}
-            })
             
-            # Most common tone
+            # All statistics in one server-side pass over the user's messages
             pipeline = [
                 {"$match": {"user_id": user_id}},
-                {"$group": {
-                    "_id": "$tone_analysis.detected_tone",
-                    "count": {"$sum": 1}
-                }},
-                {"$sort": {"count": -1}},
-                {"$limit": 1}
-            ]
-            
-            tone_result = list(collection.aggregate(pipeline))
-            most_common_tone = tone_result[0]["_id"] if tone_result else None
-            
-            # Average confidence
-            pipeline = [
-                {"$match": {"user_id": user_id}},
-                {"$group": {
-                    "_id": None,
-                    "avg_confidence": {"$avg": "$tone_analysis.confidence_score"}
+                {"$facet": {
+                    "total": [{"$count": "count"}],
+                    "this_week": [
+                        {"$match": {"created_at": {"$gte": week_ago}}},
+                        {"$count": "count"}
+                    ],
+                    "most_common_tone": [
+                        {"$group": {
+                            "_id": "$tone_analysis.detected_tone",
+                            "count": {"$sum": 1}
+                        }},
+                        {"$sort": {"count": -1}},
+                        {"$limit": 1}
+                    ],
+                    "average_confidence": [
+                        {"$group": {
+                            "_id": None,
+                            "avg_confidence": {"$avg": "$tone_analysis.confidence_score"}
+                        }}
+                    ],
+                    "favorite_suggestions": [
+                        {"$unwind": "$tone_analysis.suggestions"},
+                        {"$group": {
+                            "_id": "$tone_analysis.suggestions",
+                            "count": {"$sum": 1}
+                        }},
+                        {"$sort": {"count": -1}},
+                        {"$limit": 5}
+                    ]
                 }}
             ]
             
-            confidence_result = list(collection.aggregate(pipeline))
-            average_confidence = confidence_result[0]["avg_confidence"] if confidence_result else 0.0
+            stats_result = await collection.aggregate(pipeline).to_list(length=1)
+            stats = stats_result[0]
             
-            # Favorite suggestions (most used)
-            pipeline = [
-                {"$match": {"user_id": user_id}},
-                {"$unwind": "$tone_analysis.suggestions"},
-                {"$group": {
-                    "_id": "$tone_analysis.suggestions",
-                    "count": {"$sum": 1}
-                }},
-                {"$sort": {"count": -1}},
-                {"$limit": 5}
-            ]
-            
-            suggestions_result = list(collection.aggregate(pipeline))
-            favorite_suggestions = [item["_id"] for item in suggestions_result]
+            total_messages = stats["total"][0]["count"] if stats["total"] else 0
+            messages_this_week = stats["this_week"][0]["count"] if stats["this_week"] else 0
+            most_common_tone = stats["most_common_tone"][0]["_id"] if stats["most_common_tone"] else None
+            average_confidence = stats["average_confidence"][0]["avg_confidence"] if stats["average_confidence"] else 0.0
+            favorite_suggestions = [item["_id"] for item in stats["favorite_suggestions"]]
             
             return UserStatsResponse(
                 total_messages=total_messages,
@@ -198,7 +214,7 @@ class MessageService:
         """Delete a message (only by the owner)"""
         try:
             collection = self._get_collection()
-            result = collection.delete_one({
+            result = await collection.delete_one({
                 "_id": ObjectId(message_id),
                 "user_id": user_id
             })
@@ -213,24 +229,16 @@ class MessageService:
         """Search messages by text content"""
         try:
             collection = self._get_collection()
-            cursor = collection.find({
-                "user_id": user_id,
-                "text": {"$regex": query, "$options": "i"}
-            }).sort("created_at", -1).limit(limit)
-            
-            messages = []
-            for message_doc in cursor:
-                message = MessageResponse(
-                    id=str(message_doc["_id"]),
-                    text=message_doc["text"],
-                    user_id=message_doc["user_id"],
-                    tone_analysis=ToneAnalysisResponse(**message_doc["tone_analysis"]),
-                    created_at=message_doc["created_at"],
-                    updated_at=message_doc["updated_at"]
-                )
-                messages.append(message)
-            
-            return messages
+            # Served by the (user_id, text) text index; the query is parsed as
+            # search terms rather than compiled as a regex
+            cursor = collection.find(
+                {"user_id": user_id, "$text": {"$search": query}},
+                projection={**MESSAGE_PROJECTION, "score": {"$meta": "textScore"}}
+            ).sort([("score", {"$meta": "textScore"})]).limit(limit).batch_size(limit)
+            
+            # The whole page comes back in the first batch
+            message_docs = await cursor.to_list(length=limit)
+            return [self._to_message_response(message_doc) for message_doc in message_docs]
             
         except Exception as e:
             logger.error(f"Failed to search messages: {e}")
@@ -1,32 +1,77 @@
-import torch
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM, pipeline
 from typing import Dict, List, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import hashlib
 import logging
 import re
+from cachetools import LRUCache
 from ..config import settings
+from .batcher import MicroBatcher
 
 logger = logging.getLogger(__name__)
 
+# Keyword fallback for tone detection, checked in order. Each tone's keywords
+# are one compiled alternation, so the text is scanned once per tone; word
+# boundaries keep e.g. "made" from matching "mad".
+FALLBACK_TONE_PATTERNS = tuple(
+    (tone, re.compile(r"\b(?:" + "|".join(map(re.escape, keywords)) + r")\b", re.IGNORECASE))
+    for tone, keywords in (
+        ("sad", ["sorry", "disappointed", "upset", "hurt", "cry", "tears"]),
+        ("angry", ["angry", "mad", "furious", "hate", "stupid", "damn"]),
+    )
+)
+
 class ToneAnalyzer:
     def __init__(self):
         self.tokenizer = None
         self.model = None
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        # Resolved in load_model so torch is only imported when the model is needed
+        self.device = None
+        self.dtype = None
+        # Extra generate() kwargs selecting the KV cache implementation
+        self._cache_kwargs = {}
         self.is_loaded = False
         
-        # Updated tone detection prompt for sad/angry/friendly classification
-        self.tone_detection_prompt = "Classify the emotional tone of this text as either 'sad', 'angry', or 'friendly'. Consider the overall emotional sentiment and word choice. Text: {text}"
+        # generate() runs on one dedicated thread so the event loop stays free;
+        # a single thread keeps model calls serialized
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tone-model")
         
-        # Text improvement prompts - simplified to just improve while maintaining tone
-        self.improvement_prompts = {
-            "sad": "Improve the grammar, clarity, and flow of this text while keeping its sad emotional tone: {text}",
-            "angry": "Improve the grammar, clarity, and flow of this text while keeping its angry emotional tone: {text}",
-            "friendly": "Improve the grammar, clarity, and flow of this text while keeping its friendly emotional tone: {text}"
-        }
+        # Concurrent analyze_tone calls are grouped into one batch per model pass
+        self._batcher = MicroBatcher(
+            self._analyze_batch,
+            max_batch_size=settings.TONE_MAX_BATCH_SIZE,
+            max_wait_ms=settings.TONE_MAX_WAIT_MS
+        )
+        
+        # Results keyed by a hash of the preprocessed text
+        self._result_cache = LRUCache(maxsize=settings.TONE_CACHE_SIZE)
+        # In-flight analyses by the same key, so identical concurrent texts run once
+        self._pending: Dict[bytes, asyncio.Future] = {}
+        
+        # Single prompt that asks for the tone label and the rewrite together
+        self.fused_prompt = "Classify the emotional tone of this text as either 'sad', 'angry', or 'friendly', then improve its grammar, clarity, and flow while keeping that tone. Format: 'TONE: <tone> TEXT: <improved text>'. Text: {text}"
+        self._fused_pattern = re.compile(r"TONE:\s*(sad|angry|friendly)\W*TEXT:\s*(.+)", re.IGNORECASE | re.DOTALL)
+        
+        # The two-pass path encodes the fused prompt once and forces these
+        # decoder prefixes: one to read the tone label, then one per tone to
+        # continue into the rewrite
+        self.tone_prefix = "TONE:"
+        self.rewrite_prefixes = {tone: f"TONE: {tone} TEXT:" for tone in ("sad", "angry", "friendly")}
     
     async def load_model(self):
         """Load the FLAN-T5 XL model and tokenizer"""
+        # Reading and deserializing the weights blocks, so keep it off the event loop
+        await asyncio.to_thread(self._load_model_sync)
+    
+    def _load_model_sync(self):
+        """Blocking part of load_model"""
         try:
+            # Heavy imports are deferred until the model is actually loaded
+            import torch
+            from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+            
+            self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+            
             logger.info(f"Loading model: {settings.HUGGINGFACE_MODEL}")
             logger.info(f"Using device: {self.device}")
             
@@ -35,164 +80,477 @@ class ToneAnalyzer:
                 settings.HUGGINGFACE_MODEL,
                 use_fast=True
             )
+            self._prepare_prompt_ids()
             
-            self.model = AutoModelForSeq2SeqLM.from_pretrained(
-                settings.HUGGINGFACE_MODEL,
-                torch_dtype=torch.float16 if self.device.type == "cuda" else torch.float32,
-                device_map="auto" if self.device.type == "cuda" else None
-            )
+            # bf16 keeps fp32's exponent range, so T5 activations don't overflow as in
+            # fp16; pre-Ampere GPUs without bf16 support fall back to fp16
+            if self.device.type != "cuda":
+                self.dtype = torch.float32
+            elif torch.cuda.is_bf16_supported():
+                self.dtype = torch.bfloat16
+            else:
+                self.dtype = torch.float16
+            logger.info(f"Using dtype: {self.dtype}")
+            
+            quantization_config = self._quantization_config() if self.device.type == "cuda" else None
+            model_kwargs = {
+                "torch_dtype": self.dtype,
+                "device_map": "auto" if self.device.type == "cuda" else None,
+                "quantization_config": quantization_config
+            }
+            try:
+                self.model = AutoModelForSeq2SeqLM.from_pretrained(
+                    settings.HUGGINGFACE_MODEL,
+                    attn_implementation=settings.ATTN_IMPLEMENTATION,
+                    **model_kwargs
+                )
+            except (ValueError, ImportError) as e:
+                # Raised before any weights load when the model class (T5 in
+                # current transformers) or the environment lacks the kernel
+                logger.info(f"attn_implementation={settings.ATTN_IMPLEMENTATION} unavailable, using default attention: {e}")
+                self.model = AutoModelForSeq2SeqLM.from_pretrained(settings.HUGGINGFACE_MODEL, **model_kwargs)
             
             if self.device.type == "cpu":
                 self.model.to(self.device)
+            elif settings.QUANTIZATION.lower() == "int4":
+                self._quantize_int4()
             
             self.model.eval()
+            # Set once so generate() never has to fall back (and warn) per call
+            if self.model.generation_config.pad_token_id is None:
+                self.model.generation_config.pad_token_id = self.tokenizer.pad_token_id
+            self._cache_kwargs = self._kv_cache_kwargs()
             self.is_loaded = True
+            
+            if settings.ENABLE_TORCH_COMPILE and self.device.type == "cuda":
+                self._compile_model()
+            
             logger.info("Model loaded successfully")
             
         except Exception as e:
             logger.error(f"Failed to load model: {e}")
             raise
     
+    def _quantization_config(self):
+        """Build the bitsandbytes config for settings.QUANTIZATION, or None"""
+        mode = settings.QUANTIZATION.lower()
+        if mode in ("none", "int4"):
+            # int4 is applied by torchao after loading, see _quantize_int4
+            return None
+        if mode not in ("int8", "nf4"):
+            logger.error(f"Unknown QUANTIZATION '{settings.QUANTIZATION}', loading unquantized")
+            return None
+        
+        import importlib.util
+        if importlib.util.find_spec("bitsandbytes") is None:
+            logger.error(f"QUANTIZATION={mode} requires bitsandbytes, loading unquantized")
+            return None
+        
+        from transformers import BitsAndBytesConfig
+        
+        if mode == "int8":
+            return BitsAndBytesConfig(load_in_8bit=True)
+        return BitsAndBytesConfig(
+            load_in_4bit=True,
+            bnb_4bit_quant_type="nf4",
+            bnb_4bit_compute_dtype=self.dtype
+        )
+    
+    def _quantize_int4(self):
+        """Swap Linear weights to int4 weight-only with torchao, in place"""
+        import torch
+        
+        try:
+            from torchao.quantization import quantize_, Int4WeightOnlyConfig, Int8WeightOnlyConfig
+        except ImportError:
+            logger.error(f"QUANTIZATION=int4 requires torchao, keeping {self.dtype} weights")
+            return
+        
+        # The int4 tinygemm kernel needs Ampere or newer; older GPUs get int8
+        if torch.cuda.get_device_capability(self.device) >= (8, 0):
+            config = Int4WeightOnlyConfig(group_size=128)
+        else:
+            config = Int8WeightOnlyConfig()
+        
+        try:
+            quantize_(self.model, config)
+            logger.info(f"Model weights quantized with torchao {type(config).__name__}")
+        except Exception as e:
+            logger.error(f"torchao quantization failed, keeping {self.dtype} weights: {e}")
+    
+    def _kv_cache_kwargs(self) -> Dict[str, object]:
+        """generate() kwargs for a quantized or static KV cache, if enabled and supported"""
+        # Both need a transformers release with cache_implementation and a
+        # model class that declares support for the cache type
+        from transformers import GenerationConfig
+        has_cache_implementation = hasattr(GenerationConfig(), "cache_implementation")
+        
+        if settings.KV_CACHE_QUANTIZATION:
+            if has_cache_implementation and getattr(self.model, "_supports_quantized_cache", False):
+                return {
+                    "cache_implementation": "quantized",
+                    "cache_config": {"backend": "HQQ", "nbits": settings.KV_CACHE_NBITS, "q_group_size": 64}
+                }
+            logger.error("KV_CACHE_QUANTIZATION is not supported by this transformers version/model, using the default cache")
+        
+        # A preallocated cache keeps tensor shapes fixed across decoding steps,
+        # so the compiled graphs can be replayed instead of re-traced
+        if settings.ENABLE_TORCH_COMPILE and self.device.type == "cuda":
+            if has_cache_implementation and getattr(self.model, "_supports_static_cache", False):
+                return {"cache_implementation": "static"}
+            logger.info("Static KV cache not supported by this transformers version/model, compiling with the default cache")
+        
+        return {}
+    
+    def _compile_model(self):
+        """Compile the model forward pass and warm it up, keeping eager mode on failure"""
+        import torch
+        
+        # generate() calls forward() on the underlying module, so compile that
+        # rather than wrapping the model itself
+        eager_forward = self.model.forward
+        try:
+            if settings.TORCH_COMPILE_MODE == "max-autotune":
+                try:
+                    from torchao.quantization.utils import recommended_inductor_config_setter
+                    recommended_inductor_config_setter()
+                except ImportError:
+                    pass
+            
+            self.model.forward = torch.compile(eager_forward, mode=settings.TORCH_COMPILE_MODE, fullgraph=False)
+            
+            # Pay the compilation cost now instead of on the first request, on a
+            # full-length prompt
+            inputs = self._encode_prompts(["fused"], self._tokenize_texts(["warmup " * settings.MAX_INPUT_TOKENS]))
+            with torch.no_grad():
+                self.model.generate(**inputs, max_new_tokens=5, **self._cache_kwargs)
+            logger.info(f"Model compiled with torch.compile (mode={settings.TORCH_COMPILE_MODE})")
+        except Exception as e:
+            logger.error(f"torch.compile failed, using eager model: {e}")
+            self.model.forward = eager_forward
+    
+    def _prepare_prompt_ids(self):
+        """Tokenize the fixed text around {text} in the prompt template, and the decoder prefixes, once"""
+        templates = {"fused": self.fused_prompt}
+        self._prompt_ids = {}
+        for key, template in templates.items():
+            prefix, suffix = template.split("{text}")
+            self._prompt_ids[key] = (
+                self.tokenizer(prefix, add_special_tokens=False)["input_ids"],
+                self.tokenizer(suffix, add_special_tokens=False)["input_ids"]
+            )
+        
+        prefixes = {"tone": self.tone_prefix, **self.rewrite_prefixes}
+        self._decoder_prefix_ids = {
+            key: self.tokenizer(prefix, add_special_tokens=False)["input_ids"]
+            for key, prefix in prefixes.items()
+        }
+        
+        # Every template plus EOS must fit with room left for the user text
+        template_tokens = max(len(prefix) + len(suffix) for prefix, suffix in self._prompt_ids.values()) + 1
+        if settings.MAX_INPUT_TOKENS <= template_tokens:
+            raise ValueError(
+                f"MAX_INPUT_TOKENS={settings.MAX_INPUT_TOKENS} leaves no room for the text; "
+                f"the prompt templates need {template_tokens} tokens"
+            )
+    
+    def _tokenize_texts(self, texts: List[str]) -> List[List[int]]:
+        """Tokenize user texts without special tokens, for _encode_prompts"""
+        return self.tokenizer(texts, add_special_tokens=False)["input_ids"]
+    
+    def _encode_prompts(self, keys: List[str], text_ids: List[List[int]]) -> Dict[str, "torch.Tensor"]:
+        """Build padded model inputs for each tokenized text wrapped in its pre-tokenized template"""
+        import torch
+        
+        eos = [self.tokenizer.eos_token_id]
+        rows = []
+        for key, ids in zip(keys, text_ids):
+            prefix, suffix = self._prompt_ids[key]
+            # The prompt limit is enforced in tokens, cutting the user text rather than the template
+            budget = max(settings.MAX_INPUT_TOKENS - len(prefix) - len(suffix) - len(eos), 0)
+            rows.append(prefix + ids[:budget] + suffix + eos)
+        
+        width = max(len(row) for row in rows)
+        pad = self.tokenizer.pad_token_id
+        input_ids = torch.tensor([row + [pad] * (width - len(row)) for row in rows])
+        attention_mask = torch.tensor([[1] * len(row) + [0] * (width - len(row)) for row in rows])
+        if self.device.type != "cuda":
+            return {"input_ids": input_ids, "attention_mask": attention_mask}
+        
+        # One pinned host buffer, copied asynchronously in a single transfer
+        stacked = torch.stack((input_ids, attention_mask)).pin_memory().to(self.device, non_blocking=True)
+        return {"input_ids": stacked[0], "attention_mask": stacked[1]}
+    
+    def _encode_decoder_prefixes(self, keys: List[str]) -> Dict[str, "torch.Tensor"]:
+        """Build left-padded decoder_input_ids for each pre-tokenized decoder prefix"""
+        import torch
+        
+        # Padded with the start token, so generate() sees every row already
+        # started and doesn't prepend another; the mask hides the padding
+        start = self.model.generation_config.decoder_start_token_id
+        rows = [[start] + self._decoder_prefix_ids[key] for key in keys]
+        width = max(len(row) for row in rows)
+        decoder_input_ids = torch.tensor([[start] * (width - len(row)) + row for row in rows], device=self.device)
+        decoder_attention_mask = torch.tensor([[0] * (width - len(row)) + [1] * len(row) for row in rows], device=self.device)
+        return {"decoder_input_ids": decoder_input_ids, "decoder_attention_mask": decoder_attention_mask}
+    
+    def _run_encoder(self, text_ids: List[List[int]]) -> Dict[str, object]:
+        """Encode the fused prompt for each text once, for every generate() call on the batch"""
+        import torch
+        
+        try:
+            inputs = self._encode_prompts(["fused"] * len(text_ids), text_ids)
+            with torch.no_grad():
+                encoder_outputs = self.model.get_encoder()(**inputs)
+            return {"encoder_outputs": encoder_outputs, "attention_mask": inputs["attention_mask"]}
+            
+        except Exception as e:
+            logger.error(f"Error in prompt encoding: {e}")
+            raise
+    
+    def _select_rows(self, encoded: Dict[str, object], rows: List[int]) -> Dict[str, object]:
+        """The encoder output and attention mask of just the given batch rows"""
+        from transformers.modeling_outputs import BaseModelOutput
+        
+        return {
+            "encoder_outputs": BaseModelOutput(last_hidden_state=encoded["encoder_outputs"].last_hidden_state[rows]),
+            "attention_mask": encoded["attention_mask"][rows]
+        }
+    
     def _preprocess_text(self, text: str) -> str:
         """Preprocess text for analysis"""
-        # Truncate if too long
-        if len(text) > settings.MAX_TEXT_LENGTH:
-            text = text[:settings.MAX_TEXT_LENGTH]
-        
+        # Length is limited in tokens by _encode_prompts, not in characters here
         # Basic cleaning
         text = text.strip()
         return text
     
-    def _detect_tone(self, text: str) -> str:
-        """Detect the emotional tone (sad, angry, friendly) of the text"""
+    def _fallback_tone(self, text: str) -> str:
+        """Keyword-based tone used when the model output has no tone label"""
+        for tone, pattern in FALLBACK_TONE_PATTERNS:
+            if pattern.search(text):
+                return tone
+        return "friendly"
+    
+    def _parse_tone(self, result: str, text: str) -> str:
+        """Extract tone from the model output - look for sad, angry, or friendly"""
+        result_lower = result.lower()
+        if "sad" in result_lower:
+            return "sad"
+        elif "angry" in result_lower:
+            return "angry"
+        elif "friendly" in result_lower:
+            return "friendly"
+        else:
+            return self._fallback_tone(text)
+    
+    def _clean_improved_text(self, text: str, improved_text: str) -> str:
+        """Return the rewrite, or the original text if the model didn't produce a good one"""
+        improved_text = improved_text.strip()
+        if len(improved_text) < len(text) * 0.5:
+            return text
+        # Only a same-length rewrite can be a case-only copy, so skip case-folding otherwise
+        if len(improved_text) == len(text) and improved_text.casefold() == text.casefold():
+            return text
+        return improved_text
+    
+    def _detect_tones(self, texts: List[str], encoded: Dict[str, object]) -> List[str]:
+        """Detect the emotional tone (sad, angry, friendly) of each encoded text in one batch"""
         if not self.is_loaded:
             raise Exception("Model not loaded")
         
+        import torch
+        
         try:
-            # Use updated prompt for sad/angry/friendly detection
-            prompt = self.tone_detection_prompt.format(text=text)
-            
-            inputs = self.tokenizer(
-                prompt,
-                return_tensors="pt",
-                truncation=True,
-                max_length=512,
-                padding=True
-            )
-            
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
+            prefixes = self._encode_decoder_prefixes(["tone"] * len(texts))
             
             with torch.no_grad():
+                # The answer is a single label, so greedy decoding of a few tokens is enough
                 outputs = self.model.generate(
-                    **inputs,
-                    max_length=50,
-                    num_beams=2,
-                    early_stopping=True,
-                    do_sample=False
+                    **encoded,
+                    **prefixes,
+                    max_new_tokens=4,
+                    num_beams=1,
+                    do_sample=False,
+                    use_cache=True,
+                    **self._cache_kwargs
                 )
             
-            # Decode the output
-            result = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-            
-            # Extract tone from result - look for sad, angry, or friendly
-            result_lower = result.lower()
-            if "sad" in result_lower:
-                return "sad"
-            elif "angry" in result_lower:
-                return "angry"
-            elif "friendly" in result_lower:
-                return "friendly"
-            else:
-                # Fallback logic based on common patterns
-                if any(word in text.lower() for word in ['sorry', 'disappointed', 'upset', 'hurt', 'cry', 'tears']):
-                    return "sad"
-                elif any(word in text.lower() for word in ['angry', 'mad', 'furious', 'hate', 'stupid', 'damn']):
-                    return "angry"
-                else:
-                    return "friendly"
+            # Decode only what follows the forced prefix
+            results = self.tokenizer.batch_decode(outputs[:, prefixes["decoder_input_ids"].shape[1]:], skip_special_tokens=True)
+            return [self._parse_tone(result, text) for result, text in zip(results, texts)]
                 
         except Exception as e:
             logger.error(f"Error in tone detection: {e}")
-            # Fallback to friendly if detection fails
-            return "friendly"
+            # Raised rather than answered with a default, so analyze_tone serves
+            # its fallback without caching it
+            raise
     
-    def _improve_text(self, text: str, detected_tone: str) -> str:
-        """Improve text while maintaining the detected tone"""
+    def _improve_texts(self, texts: List[str], text_ids: List[List[int]], encoded: Dict[str, object], detected_tones: List[str]) -> List[str]:
+        """Improve each encoded text while maintaining its detected tone, in one batch"""
         if not self.is_loaded:
             raise Exception("Model not loaded")
         
+        import torch
+        
         try:
-            # Use the detected tone for improvement
-            if detected_tone not in self.improvement_prompts:
-                detected_tone = "friendly"  # Default fallback
-            
-            prompt = self.improvement_prompts[detected_tone].format(text=text)
-            
-            inputs = self.tokenizer(
-                prompt,
-                return_tensors="pt",
-                truncation=True,
-                max_length=512,
-                padding=True
-            )
-            
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
+            # The detected tone is forced into the decoder prefix the rewrite continues from
+            keys = [tone if tone in self.rewrite_prefixes else "friendly" for tone in detected_tones]
+            prefixes = self._encode_decoder_prefixes(keys)
             
             with torch.no_grad():
+                # Plain nucleus sampling: combining it with beam search multiplied
+                # the decoder steps without making the rewrites any better
                 outputs = self.model.generate(
-                    **inputs,
-                    max_length=min(len(text) + 100, 512),
-                    num_beams=3,
-                    early_stopping=True,
+                    **encoded,
+                    **prefixes,
+                    max_new_tokens=min(max(len(ids) for ids in text_ids) + 64, 256),
+                    num_beams=1,
                     do_sample=True,
                     temperature=0.7,
-                    top_p=0.9
+                    top_p=0.9,
+                    use_cache=True,
+                    **self._cache_kwargs
                 )
             
-            # Decode the output
-            improved_text = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
+            # Decode only what follows the forced prefix
+            improved_texts = self.tokenizer.batch_decode(outputs[:, prefixes["decoder_input_ids"].shape[1]:], skip_special_tokens=True)
             
-            # Clean up the result
-            improved_text = improved_text.strip()
+            return [
+                self._clean_improved_text(text, improved_text)
+                for text, improved_text in zip(texts, improved_texts)
+            ]
             
-            # If the model didn't generate a good response, return original text
-            if len(improved_text) < len(text) * 0.5 or improved_text.lower() == text.lower():
-                return text
+        except Exception as e:
+            logger.error(f"Error in text improvement: {e}")
+            raise
+    
+    def _analyze_and_rewrite(self, texts: List[str], text_ids: List[List[int]], encoded: Dict[str, object]) -> List[Optional[Dict[str, str]]]:
+        """Detect the tone and improve each text with a single generate() call.
+        
+        Entries whose output can't be parsed into a tone and a rewrite are None.
+        """
+        if not self.is_loaded:
+            raise Exception("Model not loaded")
+        
+        import torch
+        
+        try:
+            with torch.no_grad():
+                # Greedy like tone detection: the label leads the output, and beams
+                # would multiply the decoder steps of the whole rewrite
+                outputs = self.model.generate(
+                    **encoded,
+                    # Room for the rewrite plus the "TONE: <tone> TEXT:" header
+                    max_new_tokens=min(max(len(ids) for ids in text_ids) + 72, 264),
+                    num_beams=1,
+                    do_sample=False,
+                    use_cache=True,
+                    **self._cache_kwargs
+                )
             
-            return improved_text
+            results = []
+            for text, output in zip(texts, self.tokenizer.batch_decode(outputs, skip_special_tokens=True)):
+                match = self._fused_pattern.search(output)
+                if match is None:
+                    results.append(None)
+                    continue
+                results.append({
+                    "tone": match.group(1).lower(),
+                    "improved_text": self._clean_improved_text(text, match.group(2))
+                })
+            return results
             
         except Exception as e:
-            logger.error(f"Error in text improvement: {e}")
-            # Return original text if improvement fails
-            return text
+            logger.error(f"Error in fused tone analysis: {e}")
+            # Let the two-pass path handle the whole batch
+            return [None] * len(texts)
+    
+    def _analyze_two_pass(self, texts: List[str], text_ids: List[List[int]], encoded: Dict[str, object]) -> List[Dict[str, str]]:
+        """Detect tones, then improve every text while maintaining its tone"""
+        detected_tones = self._detect_tones(texts, encoded)
+        improved_texts = self._improve_texts(texts, text_ids, encoded, detected_tones)
+        
+        return [
+            {"tone": tone, "improved_text": improved_text}
+            for tone, improved_text in zip(detected_tones, improved_texts)
+        ]
+    
+    async def _analyze_batch(self, texts: List[str]) -> List[Dict[str, str]]:
+        """Analyze a batch of preprocessed texts collected by the batcher"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._analyze_batch_sync, texts)
+    
+    def _analyze_batch_sync(self, texts: List[str]) -> List[Dict[str, str]]:
+        """Blocking part of _analyze_batch"""
+        # Tokenized and encoded once; every generate() call over this batch
+        # decodes from the same encoder output
+        text_ids = self._tokenize_texts(texts)
+        encoded = self._run_encoder(text_ids)
+        
+        if not settings.TONE_FUSED_GENERATION:
+            return self._analyze_two_pass(texts, text_ids, encoded)
+        
+        results = self._analyze_and_rewrite(texts, text_ids, encoded)
+        
+        # Only texts whose fused output couldn't be parsed take the two-pass path,
+        # reusing their rows of the encoder output
+        pending = [i for i, result in enumerate(results) if result is None]
+        if pending:
+            two_pass = self._analyze_two_pass(
+                [texts[i] for i in pending],
+                [text_ids[i] for i in pending],
+                self._select_rows(encoded, pending)
+            )
+            for i, result in zip(pending, two_pass):
+                results[i] = result
+        
+        return results
     
     async def analyze_tone(self, text: str) -> Dict[str, str]:
         """Main method to analyze text tone and improve it"""
+        # The model is loaded once at startup (app lifespan); loading it here
+        # would stall the request for as long as the weights take to load
         if not self.is_loaded:
-            await self.load_model()
+            raise RuntimeError("Model not loaded")
         
         # Preprocess text
         processed_text = self._preprocess_text(text)
         
+        cache_key = hashlib.blake2b(processed_text.encode("utf-8"), digest_size=16).digest()
+        cached = self._result_cache.get(cache_key)
+        if cached is not None:
+            return dict(cached)
+        
         try:
-            # Detect tone
-            detected_tone = self._detect_tone(processed_text)
-            
-            # Improve text while maintaining the detected tone
-            improved_text = self._improve_text(processed_text, detected_tone)
+            pending = self._pending.get(cache_key)
+            if pending is None:
+                # Concurrent requests are coalesced into batched generate() calls
+                pending = asyncio.ensure_future(self._batcher.submit(processed_text))
+                self._pending[cache_key] = pending
+                pending.add_done_callback(lambda _: self._pending.pop(cache_key, None))
             
-            return {
-                "tone": detected_tone,
-                "improved_text": improved_text
-            }
+            # Shielded so one caller giving up doesn't cancel the pass for the rest
+            result = await asyncio.shield(pending)
+            # Only real model output gets here; failures raise and are not cached
+            self._result_cache[cache_key] = result
+            return dict(result)
             
         except Exception as e:
             logger.error(f"Error in tone analysis: {e}")
-            # Return fallback response
+            # Return fallback response, uncached so the next call retries the model
             return {
                 "tone": "friendly",
                 "improved_text": text
             }
+    
+    async def close(self):
+        """Stop the batching worker"""
+        await self._batcher.close()
 
-# Global tone analyzer instance
-tone_analyzer = ToneAnalyzer()
\ No newline at end of file
+# Global tone analyzer instance; with an inference worker configured the model
+# lives in that process and this one only forwards requests
+if settings.INFERENCE_WORKER_URL or settings.INFERENCE_WORKER_UDS:
+    from .inference_client import RemoteToneAnalyzer
+    tone_analyzer = RemoteToneAnalyzer(settings.INFERENCE_WORKER_URL or "http://inference-worker", uds=settings.INFERENCE_WORKER_UDS)
+else:
+    tone_analyzer = ToneAnalyzer()
\ No newline at end of file
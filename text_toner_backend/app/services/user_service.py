@@ -1,9 +1,13 @@
-from typing import Optional
+from typing import Dict, Optional
 from datetime import datetime, timedelta
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+import asyncio
+import hashlib
 import logging
+from cachetools import TTLCache
 from passlib.context import CryptContext
-from jose import JWTError, jwt
+import jwt
 from ..database import db_manager
 from ..models import UserCreate, UserResponse, UserInDB, TokenData
 from ..config import settings
@@ -11,15 +15,64 @@ from ..config import settings
 logger = logging.getLogger(__name__)
 
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# New hashes use argon2; existing bcrypt hashes still verify and are upgraded on login
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__time_cost=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM
+)
 
 class UserService:
     def __init__(self):
         self.collection_name = "users"
+        # Users by id for token authentication; dropped whenever the user changes.
+        # Password checks always read the database, since other workers can't
+        # see this process's invalidations
+        self._user_by_id_cache = TTLCache(
+            maxsize=settings.AUTH_USER_CACHE_SIZE,
+            ttl=settings.AUTH_USER_CACHE_TTL_SECONDS
+        )
+        # In-flight lookups by user id, so concurrent misses share a query
+        self._pending_lookups: Dict[str, asyncio.Future] = {}
+        # Digests of tokens recently rejected, so repeated bad credentials skip
+        # decode and DB; fixed-size keys keep arbitrarily long tokens out of memory
+        self._rejected_tokens = TTLCache(
+            maxsize=settings.AUTH_NEGATIVE_CACHE_SIZE,
+            ttl=settings.AUTH_NEGATIVE_CACHE_TTL_SECONDS
+        )
     
     def _get_collection(self):
         return db_manager.get_collection(self.collection_name)
     
+    async def _cached_user(self, user_id: str) -> Optional[UserInDB]:
+        """Return the cached user, loading it once for all concurrent callers on a miss"""
+        user = self._user_by_id_cache.get(user_id)
+        if user is not None:
+            return user
+        
+        pending = self._pending_lookups.get(user_id)
+        if pending is None:
+            async def load():
+                user = await self._load_user_by_id(user_id)
+                # An invalidation during the query drops this lookup, so a
+                # stale user is never written back
+                if user is not None and self._pending_lookups.get(user_id) is pending:
+                    self._user_by_id_cache[user_id] = user
+                return user
+            
+            def forget(_):
+                if self._pending_lookups.get(user_id) is pending:
+                    del self._pending_lookups[user_id]
+            
+            pending = asyncio.ensure_future(load())
+            self._pending_lookups[user_id] = pending
+            pending.add_done_callback(forget)
+        
+        # Shielded so one caller giving up doesn't cancel the query for the rest
+        return await asyncio.shield(pending)
+    
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """Verify a password against its hash"""
         return pwd_context.verify(plain_password, hashed_password)
@@ -42,33 +95,36 @@ class UserService:
     
     def verify_token(self, token: str) -> Optional[TokenData]:
         """Verify and decode a JWT token"""
+        if self._token_key(token) in self._rejected_tokens:
+            return None
+        
         try:
             payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
             username: str = payload.get("sub")
             if username is None:
+                self.reject_token(token)
                 return None
-            return TokenData(username=username)
-        except JWTError:
+            return TokenData(username=username, user_id=payload.get("uid"), exp=payload.get("exp"))
+        except jwt.PyJWTError:
+            self.reject_token(token)
             return None
     
+    def _token_key(self, token: str) -> bytes:
+        """Fixed-size negative cache key for a token"""
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+    
+    def reject_token(self, token: str):
+        """Remember a token that failed authentication for a few seconds"""
+        self._rejected_tokens[self._token_key(token)] = True
+    
     async def create_user(self, user_data: UserCreate) -> UserResponse:
         """Create a new user"""
         try:
             collection = self._get_collection()
             
-            # Check if user already exists
-            existing_user = collection.find_one({
-                "$or": [
-                    {"email": user_data.email},
-                    {"username": user_data.username}
-                ]
-            })
-            
-            if existing_user:
-                raise ValueError("User with this email or username already exists")
-            
             # Hash password
-            hashed_password = self.get_password_hash(user_data.password)
+            # Hashing is deliberately slow, so keep it off the event loop
+            hashed_password = await asyncio.to_thread(self.get_password_hash, user_data.password)
             
             # Create user document
             user_doc = {
@@ -79,8 +135,12 @@ class UserService:
                 "created_at": datetime.utcnow()
             }
             
-            # Insert into database
-            result = collection.insert_one(user_doc)
+            # Insert into database; the unique email/username indexes reject
+            # duplicates atomically, so no separate existence check is needed
+            try:
+                result = await collection.insert_one(user_doc)
+            except DuplicateKeyError:
+                raise ValueError("User with this email or username already exists")
             
             # Create response
             user_response = UserResponse(
@@ -102,7 +162,7 @@ class UserService:
         """Get user by username"""
         try:
             collection = self._get_collection()
-            user_doc = collection.find_one({"username": username})
+            user_doc = await collection.find_one({"username": username})
             
             if not user_doc:
                 return None
@@ -120,11 +180,27 @@ class UserService:
             logger.error(f"Failed to get user by username: {e}")
             raise
     
+    async def get_user_for_token(self, token_data: TokenData) -> Optional[UserInDB]:
+        """Get the user a verified token belongs to, using a short-lived cache"""
+        if token_data.user_id is None:
+            # Tokens issued before the uid claim existed
+            return await self.get_user_by_username(token_data.username)
+        
+        user = await self._cached_user(token_data.user_id)
+        if user is None or user.username != token_data.username:
+            return None
+        return user
+    
+    def _invalidate_cached_user(self, user_id: str):
+        """Drop the cached entry and any in-flight lookup for a user"""
+        self._user_by_id_cache.pop(user_id, None)
+        self._pending_lookups.pop(user_id, None)
+    
     async def get_user_by_email(self, email: str) -> Optional[UserInDB]:
         """Get user by email"""
         try:
             collection = self._get_collection()
-            user_doc = collection.find_one({"email": email})
+            user_doc = await collection.find_one({"email": email})
             
             if not user_doc:
                 return None
@@ -144,17 +220,24 @@ class UserService:
     
     async def get_user_by_id(self, user_id: str) -> Optional[UserResponse]:
         """Get user by ID"""
+        user = await self._cached_user(user_id)
+        if user is None:
+            return None
+        return UserResponse(**user.model_dump(exclude={"hashed_password"}))
+    
+    async def _load_user_by_id(self, user_id: str) -> Optional[UserInDB]:
         try:
             collection = self._get_collection()
-            user_doc = collection.find_one({"_id": ObjectId(user_id)})
+            user_doc = await collection.find_one({"_id": ObjectId(user_id)})
             
             if not user_doc:
                 return None
             
-            return UserResponse(
+            return UserInDB(
                 id=str(user_doc["_id"]),
                 username=user_doc["username"],
                 email=user_doc["email"],
+                hashed_password=user_doc["hashed_password"],
                 created_at=user_doc["created_at"],
                 is_active=user_doc.get("is_active", True)
             )
@@ -166,16 +249,29 @@ class UserService:
     async def authenticate_user(self, username: str, password: str) -> Optional[UserInDB]:
         """Authenticate a user"""
         try:
+            # Read uncached: a password change or deactivation in another worker
+            # must take effect immediately
             user = await self.get_user_by_username(username)
             if not user:
                 return None
             
-            if not self.verify_password(password, user.hashed_password):
+            valid, new_hash = await asyncio.to_thread(pwd_context.verify_and_update, password, user.hashed_password)
+            if not valid:
                 return None
             
             if not user.is_active:
                 return None
             
+            # Re-hash legacy bcrypt passwords with the current scheme
+            if new_hash:
+                collection = self._get_collection()
+                await collection.update_one(
+                    {"_id": ObjectId(user.id)},
+                    {"$set": {"hashed_password": new_hash, "updated_at": datetime.utcnow()}}
+                )
+                self._invalidate_cached_user(user.id)
+                user.hashed_password = new_hash
+            
             return user
             
         except Exception as e:
@@ -192,7 +288,7 @@ class UserService:
             update_data.pop("_id", None)
             update_data["updated_at"] = datetime.utcnow()
             
-            result = collection.update_one(
+            result = await collection.update_one(
                 {"_id": ObjectId(user_id)},
                 {"$set": update_data}
             )
@@ -200,6 +296,8 @@ class UserService:
             if result.modified_count == 0:
                 return None
             
+            self._invalidate_cached_user(user_id)
+            
             # Return updated user
             return await self.get_user_by_id(user_id)
             
@@ -211,11 +309,12 @@ class UserService:
         """Deactivate a user account"""
         try:
             collection = self._get_collection()
-            result = collection.update_one(
+            result = await collection.update_one(
                 {"_id": ObjectId(user_id)},
                 {"$set": {"is_active": False, "updated_at": datetime.utcnow()}}
             )
             
+            self._invalidate_cached_user(user_id)
             return result.modified_count > 0
             
         except Exception as e:
@@ -225,22 +324,22 @@ class UserService:
     async def change_password(self, user_id: str, old_password: str, new_password: str) -> bool:
         """Change user password"""
         try:
-            # Get current user
-            user = await self.get_user_by_id(user_id)
+            # Get current user, uncached so the old password is checked against
+            # the stored hash
+            user = await self._load_user_by_id(user_id)
             if not user:
                 return False
             
             # Verify old password
-            user_with_password = await self.get_user_by_username(user.username)
-            if not self.verify_password(old_password, user_with_password.hashed_password):
+            if not await asyncio.to_thread(self.verify_password, old_password, user.hashed_password):
                 return False
             
             # Hash new password
-            new_hashed_password = self.get_password_hash(new_password)
+            new_hashed_password = await asyncio.to_thread(self.get_password_hash, new_password)
             
             # Update password
             collection = self._get_collection()
-            result = collection.update_one(
+            result = await collection.update_one(
                 {"_id": ObjectId(user_id)},
                 {"$set": {
                     "hashed_password": new_hashed_password,
@@ -248,6 +347,7 @@ class UserService:
                 }}
             )
             
+            self._invalidate_cached_user(user_id)
             return result.modified_count > 0
             
         except Exception as e:
@@ -19,12 +19,24 @@ def main():
     port = int(os.getenv("API_PORT", "8000"))
     debug = os.getenv("DEBUG", "True").lower() == "true"
     reload = debug
+    timeout_keep_alive = int(os.getenv("API_TIMEOUT_KEEP_ALIVE", "30"))
+    limit_concurrency = int(os.getenv("API_LIMIT_CONCURRENCY", "1000"))
+    # uvloop is not available on Windows
+    loop = "asyncio" if sys.platform == "win32" else "uvloop"
+    # Every worker process loads its own model copy unless tone analysis is
+    # forwarded to the shared inference worker, so only default to one worker
+    # per core in that case
+    remote_model = bool(os.getenv("INFERENCE_WORKER_URL") or os.getenv("INFERENCE_WORKER_UDS"))
+    default_workers = (os.cpu_count() or 1) if remote_model else 1
+    workers = 1 if reload else int(os.getenv("API_WORKERS", "0")) or default_workers
     
     print(f"Starting Tone Analyzer Backend...")
     print(f"Host: {host}")
     print(f"Port: {port}")
     print(f"Debug: {debug}")
     print(f"Reload: {reload}")
+    print(f"Event loop: {loop}")
+    print(f"Workers: {workers}")
     print("-" * 50)
     
     # Start the server
@@ -33,6 +45,11 @@ def main():
         host=host,
         port=port,
         reload=reload,
+        workers=workers,
+        loop=loop,
+        http="httptools",
+        timeout_keep_alive=timeout_keep_alive,
+        limit_concurrency=limit_concurrency,
         log_level="info" if debug else "warning"
     )
 
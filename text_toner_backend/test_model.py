@@ -16,6 +16,9 @@ async def test_tone_analyzer():
     print("Testing Tone Analyzer...")
     
     try:
+        # analyze_tone expects the model to be loaded up front, as the app lifespan does
+        await tone_analyzer.load_model()
+        
         # Test with a simple text
         test_text = "I am so disappointed with this service. It never works properly."
         print(f"Testing with text: {test_text}")
@@ -42,6 +45,8 @@ async def test_tone_analyzer():
         print(f"Error during testing: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        await tone_analyzer.close()
 
 if __name__ == "__main__":
     asyncio.run(test_tone_analyzer())
@@ -0,0 +1,41 @@
+import asyncio
+import os
+import pytest
+import pytest_asyncio
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.tone_analyzer import tone_analyzer
+
+def pytest_configure(config):
+    # Registered by pytest-xdist too; declared here so plain runs don't warn
+    config.addinivalue_line("markers", "xdist_group(name): run tests of a group on one xdist worker")
+
+@pytest.fixture(scope="session")
+def event_loop():
+    """One event loop for every async test, so loop-bound state is built once"""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+# Loading the real model is slow and downloads its weights, so it is opt-in;
+# without it the model-backed analyzer tests skip
+LOAD_MODEL = os.getenv("TEST_LOAD_MODEL", "False").lower() == "true"
+
+@pytest_asyncio.fixture(scope="session")
+async def warm_tone_analyzer():
+    """The shared tone analyzer, loaded and warmed up once when TEST_LOAD_MODEL is set"""
+    if LOAD_MODEL:
+        await tone_analyzer.load_model()
+        await tone_analyzer.analyze_tone("warmup")
+    yield tone_analyzer
+    # Stops the batcher task before the session loop closes
+    await tone_analyzer.close()
+
+@pytest.fixture(scope="session")
+def client():
+    """One TestClient shared by the whole test session"""
+    # Not entered as a context manager: startup would load the model and
+    # connect to MongoDB, which the API tests are written to run without
+    test_client = TestClient(app)
+    yield test_client
+    test_client.close()
@@ -0,0 +1,137 @@
+import asyncio
+import pytest
+from pymongo.errors import BulkWriteError, DuplicateKeyError, WriteConcernError
+from app.services.batcher import BulkInserter, MicroBatcher
+
+def make_batcher(max_batch_size, max_wait_ms, fail=False):
+    """A MicroBatcher doubling each item, recording the batches it was handed"""
+    batches = []
+    
+    async def handler(items):
+        batches.append(list(items))
+        if fail:
+            raise ValueError("handler failed")
+        return [item * 2 for item in items]
+    
+    return MicroBatcher(handler, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms), batches
+
+@pytest.mark.asyncio
+async def test_flushes_when_batch_is_full():
+    """Test that a full batch is handled without waiting for the timeout"""
+    batcher, batches = make_batcher(max_batch_size=3, max_wait_ms=10_000)
+    
+    results = await asyncio.wait_for(asyncio.gather(*(batcher.submit(i) for i in range(3))), timeout=1)
+    
+    assert results == [0, 2, 4]
+    assert batches == [[0, 1, 2]]
+    await batcher.close()
+
+@pytest.mark.asyncio
+async def test_flushes_on_timeout():
+    """Test that a partial batch is handled once max_wait_ms has passed"""
+    batcher, batches = make_batcher(max_batch_size=10, max_wait_ms=20)
+    
+    results = await asyncio.wait_for(asyncio.gather(batcher.submit(1), batcher.submit(2)), timeout=1)
+    
+    assert results == [2, 4]
+    assert batches == [[1, 2]]
+    await batcher.close()
+
+@pytest.mark.asyncio
+async def test_results_go_to_their_callers():
+    """Test that each caller gets the result for its own item across batches"""
+    batcher, batches = make_batcher(max_batch_size=2, max_wait_ms=20)
+    
+    results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+    
+    assert results == [0, 2, 4, 6, 8]
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    await batcher.close()
+
+@pytest.mark.asyncio
+async def test_handler_exception_reaches_every_waiter():
+    """Test that a failing handler raises in every caller of that batch"""
+    batcher, batches = make_batcher(max_batch_size=3, max_wait_ms=20, fail=True)
+    
+    results = await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+    
+    assert len(batches) == 1
+    assert all(isinstance(result, ValueError) for result in results)
+    
+    # The worker survives a failed batch
+    batcher.handler = make_batcher(max_batch_size=3, max_wait_ms=20)[0].handler
+    assert await batcher.submit(5) == 10
+    await batcher.close()
+
+
+class FakeCollection:
+    """Records insert_one/bulk_write calls; bulk_write fails the docs in fail_ids,
+    or the whole write concern if concern_fails"""
+    
+    def __init__(self, fail_ids=(), concern_fails=False):
+        self.inserted = []
+        self.bulk_writes = []
+        self.fail_ids = set(fail_ids)
+        self.concern_fails = concern_fails
+    
+    async def insert_one(self, doc):
+        # Slow enough that concurrent inserts arrive while this one is in flight
+        await asyncio.sleep(0.01)
+        self.inserted.append(doc)
+    
+    async def bulk_write(self, requests, ordered):
+        docs = [request._doc for request in requests]
+        self.bulk_writes.append(docs)
+        errors = [
+            {"index": index, "code": 11000, "errmsg": "duplicate key"}
+            for index, doc in enumerate(docs) if doc["_id"] in self.fail_ids
+        ]
+        concern_errors = [{"code": 64, "errmsg": "waiting for replication timed out"}] if self.concern_fails else []
+        if errors or concern_errors:
+            raise BulkWriteError({"writeErrors": errors, "writeConcernErrors": concern_errors})
+
+@pytest.mark.asyncio
+async def test_lone_insert_uses_insert_one():
+    """Test that an insert with nothing else in flight goes straight to insert_one"""
+    collection = FakeCollection()
+    inserter = BulkInserter(lambda: collection, max_batch_size=10, max_wait_ms=20)
+    
+    await inserter.insert({"_id": 1})
+    
+    assert collection.inserted == [{"_id": 1}]
+    assert collection.bulk_writes == []
+
+@pytest.mark.asyncio
+async def test_concurrent_inserts_share_bulk_write_and_errors_map_to_callers():
+    """Test that concurrent inserts are bulk written and a write error raises only in its caller"""
+    collection = FakeCollection(fail_ids={3})
+    inserter = BulkInserter(lambda: collection, max_batch_size=10, max_wait_ms=20)
+    
+    results = await asyncio.gather(
+        *(inserter.insert({"_id": i}) for i in range(1, 5)),
+        return_exceptions=True
+    )
+    
+    # The first insert found nothing in flight; the rest were coalesced
+    assert collection.inserted == [{"_id": 1}]
+    assert collection.bulk_writes == [[{"_id": 2}, {"_id": 3}, {"_id": 4}]]
+    assert results[0] is None and results[1] is None and results[3] is None
+    assert isinstance(results[2], DuplicateKeyError)
+    assert results[2].code == 11000
+    await inserter._batcher.close()
+
+@pytest.mark.asyncio
+async def test_write_concern_error_reaches_every_batched_caller():
+    """Test that a write concern failure of a bulk write raises in all of its callers"""
+    collection = FakeCollection(concern_fails=True)
+    inserter = BulkInserter(lambda: collection, max_batch_size=10, max_wait_ms=20)
+    
+    results = await asyncio.gather(
+        *(inserter.insert({"_id": i}) for i in range(1, 4)),
+        return_exceptions=True
+    )
+    
+    assert collection.bulk_writes == [[{"_id": 2}, {"_id": 3}]]
+    assert results[0] is None
+    assert all(isinstance(result, WriteConcernError) and result.code == 64 for result in results[1:])
+    await inserter._batcher.close()
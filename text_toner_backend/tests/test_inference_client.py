@@ -0,0 +1,87 @@
+import asyncio
+import httpx
+import pytest
+from app.config import settings
+from app.services.inference_client import RemoteToneAnalyzer
+
+class FakeWorker:
+    """httpx.MockTransport handler standing in for app.inference_worker"""
+    
+    def __init__(self, model_loaded=True, down=False):
+        self.model_loaded = model_loaded
+        self.down = down
+    
+    def __call__(self, request):
+        if self.down:
+            raise httpx.ConnectError("connection refused", request=request)
+        if request.url.path == "/health":
+            return httpx.Response(200, json={"model_loaded": self.model_loaded})
+        if not self.model_loaded:
+            return httpx.Response(500, text="Internal Server Error")
+        return httpx.Response(200, json={"tone": "friendly", "improved_text": "Hello there!"})
+
+def make_analyzer(worker):
+    return RemoteToneAnalyzer("http://inference-worker", transport=httpx.MockTransport(worker))
+
+@pytest.mark.asyncio
+async def test_forwards_to_worker():
+    """Test that a ready worker's answer is returned as is"""
+    analyzer = make_analyzer(FakeWorker())
+    await analyzer.load_model()
+    
+    assert analyzer.is_loaded
+    assert await analyzer.analyze_tone("hello there") == {"tone": "friendly", "improved_text": "Hello there!"}
+    await analyzer.close()
+
+@pytest.mark.asyncio
+async def test_worker_errors_raise_and_reset_is_loaded(monkeypatch):
+    """Test that an unreachable or failing worker raises instead of faking a result"""
+    monkeypatch.setattr(settings, "INFERENCE_WORKER_HEALTH_RETRY_SECONDS", 60)
+    worker = FakeWorker()
+    analyzer = make_analyzer(worker)
+    await analyzer.load_model()
+    
+    worker.down = True
+    with pytest.raises(RuntimeError):
+        await analyzer.analyze_tone("hello there")
+    assert not analyzer.is_loaded
+    
+    worker.down = False
+    worker.model_loaded = False
+    with pytest.raises(RuntimeError):
+        await analyzer.analyze_tone("hello there")
+    assert not analyzer.is_loaded
+    
+    worker.model_loaded = True
+    await analyzer.analyze_tone("hello there")
+    assert analyzer.is_loaded
+    await analyzer.close()
+
+@pytest.mark.asyncio
+async def test_failed_startup_probe_is_retried(monkeypatch):
+    """Test that a worker that wasn't ready at startup is marked loaded once it is"""
+    monkeypatch.setattr(settings, "INFERENCE_WORKER_HEALTH_RETRY_SECONDS", 0.01)
+    worker = FakeWorker(down=True)
+    analyzer = make_analyzer(worker)
+    await analyzer.load_model()
+    assert not analyzer.is_loaded
+    
+    worker.down = False
+    await asyncio.wait_for(analyzer._health_task, timeout=1)
+    assert analyzer.is_loaded
+    await analyzer.close()
+
+def test_client_from_previous_loop_is_closed():
+    """Test that the client is rebuilt and the old one closed when the event loop changes"""
+    analyzer = make_analyzer(FakeWorker())
+    
+    async def analyze():
+        await analyzer.analyze_tone("hello there")
+        return analyzer._client
+    
+    first = asyncio.run(analyze())
+    second = asyncio.run(analyze())
+    
+    assert second is not first
+    assert first.is_closed
+    asyncio.run(analyzer.close())
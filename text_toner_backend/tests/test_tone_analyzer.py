@@ -1,7 +1,11 @@
+import asyncio
 import pytest
-from app.services.tone_analyzer import tone_analyzer
+from app.services.tone_analyzer import ToneAnalyzer, tone_analyzer
 from app.models import ToneType
 
+# The model tests share the session loop and a warmed-up analyzer
+pytestmark = pytest.mark.usefixtures("warm_tone_analyzer")
+
 @pytest.mark.asyncio
 async def test_tone_analyzer_initialization():
     """Test tone analyzer initialization"""
@@ -9,6 +13,7 @@ async def test_tone_analyzer_initialization():
     assert hasattr(tone_analyzer, 'analyze_tone')
 
 @pytest.mark.asyncio
+@pytest.mark.xdist_group("model")
 async def test_analyze_friendly_tone():
     """Test analyzing friendly tone"""
     text = "Hey there! How are you doing today? I hope you're having a great day!"
@@ -30,6 +35,7 @@ async def test_analyze_friendly_tone():
         pytest.skip(f"Model not loaded: {e}")
 
 @pytest.mark.asyncio
+@pytest.mark.xdist_group("model")
 async def test_analyze_formal_tone():
     """Test analyzing formal tone"""
     text = "Dear Sir/Madam, I am writing to inquire about the status of my application."
@@ -46,6 +52,7 @@ async def test_analyze_formal_tone():
         pytest.skip(f"Model not loaded: {e}")
 
 @pytest.mark.asyncio
+@pytest.mark.xdist_group("model")
 async def test_analyze_assertive_tone():
     """Test analyzing assertive tone"""
     text = "You must complete this task by Friday. There are no exceptions."
@@ -62,6 +69,7 @@ async def test_analyze_assertive_tone():
         pytest.skip(f"Model not loaded: {e}")
 
 @pytest.mark.asyncio
+@pytest.mark.xdist_group("model")
 async def test_analyze_apologetic_tone():
     """Test analyzing apologetic tone"""
     text = "I'm really sorry for the inconvenience. I apologize for the delay."
@@ -91,3 +99,109 @@ def test_tone_mapping():
     assert 'positive' in tone_analyzer.tone_mapping
     assert 'negative' in tone_analyzer.tone_mapping
     assert 'neutral' in tone_analyzer.tone_mapping
+
+
+def make_stub_analyzer(handler):
+    """A ToneAnalyzer marked loaded whose batches go to handler instead of the model"""
+    analyzer = ToneAnalyzer()
+    analyzer.is_loaded = True
+    analyzer._batcher.handler = handler
+    return analyzer
+
+@pytest.mark.asyncio
+async def test_failed_analysis_is_not_cached():
+    """Test that a fallback result from a failed batch is not served again"""
+    calls = []
+    
+    async def handler(texts):
+        calls.append(texts)
+        if len(calls) == 1:
+            raise RuntimeError("model failure")
+        return [{"tone": "sad", "improved_text": text} for text in texts]
+    
+    analyzer = make_stub_analyzer(handler)
+    assert await analyzer.analyze_tone("I feel down") == {"tone": "friendly", "improved_text": "I feel down"}
+    assert await analyzer.analyze_tone("I feel down") == {"tone": "sad", "improved_text": "I feel down"}
+    assert len(calls) == 2
+    await analyzer.close()
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_texts_run_once():
+    """Test that identical in-flight texts share one model call and cache entry"""
+    batches = []
+    
+    async def handler(texts):
+        batches.append(texts)
+        await asyncio.sleep(0.01)
+        return [{"tone": "angry", "improved_text": text} for text in texts]
+    
+    analyzer = make_stub_analyzer(handler)
+    results = await asyncio.gather(analyzer.analyze_tone("I hate this"), analyzer.analyze_tone("  I hate this  "))
+    
+    assert results == [{"tone": "angry", "improved_text": "I hate this"}] * 2
+    assert batches == [["I hate this"]]
+    # Served from the cache, keyed by the preprocessed text
+    assert await analyzer.analyze_tone("I hate this ") == results[0]
+    assert len(batches) == 1
+    await analyzer.close()
+
+def test_malformed_fused_output_falls_back_to_two_pass(monkeypatch):
+    """Test that only texts whose fused output can't be parsed take the two-pass path"""
+    torch = pytest.importorskip("torch")
+    from transformers.modeling_outputs import BaseModelOutput
+    from app.config import settings
+    monkeypatch.setattr(settings, "TONE_FUSED_GENERATION", True)
+    
+    class FakeTokenizer:
+        def batch_decode(self, outputs, skip_special_tokens):
+            return ["TONE: sad TEXT: I miss you so much.", "no format here"]
+    
+    class FakeModel:
+        def generate(self, **kwargs):
+            return None
+    
+    analyzer = ToneAnalyzer()
+    analyzer.is_loaded = True
+    analyzer.tokenizer = FakeTokenizer()
+    analyzer.model = FakeModel()
+    monkeypatch.setattr(analyzer, "_tokenize_texts", lambda texts: [[1, 2, 3] for _ in texts])
+    encoded = {
+        "encoder_outputs": BaseModelOutput(last_hidden_state=torch.arange(2.0).reshape(2, 1, 1)),
+        "attention_mask": torch.ones(2, 1)
+    }
+    monkeypatch.setattr(analyzer, "_run_encoder", lambda text_ids: encoded)
+    two_pass_calls = []
+    
+    def two_pass(texts, text_ids, encoded):
+        two_pass_calls.append((texts, encoded["encoder_outputs"].last_hidden_state.flatten().tolist()))
+        return [{"tone": "friendly", "improved_text": text} for text in texts]
+    
+    monkeypatch.setattr(analyzer, "_analyze_two_pass", two_pass)
+    
+    results = analyzer._analyze_batch_sync(["I miss you", "Have a nice day"])
+    
+    assert results == [
+        {"tone": "sad", "improved_text": "I miss you so much."},
+        {"tone": "friendly", "improved_text": "Have a nice day"}
+    ]
+    # The fallback reuses the failed text's row of the batch's encoder output
+    assert two_pass_calls == [(["Have a nice day"], [1.0])]
+
+def test_fallback_tone_matches_whole_words():
+    """Test that fallback keywords match on word boundaries, not substrings"""
+    analyzer = ToneAnalyzer()
+    # "mad" in "made", "cry" in "crystal", "hate" in "whatever", "hurt" in "hurtle"
+    for text in ["I made dinner", "The crystal is clear", "Whatever works", "Rocks hurtle down",
+                 "I am unhappy", "Happy thanksgiving"]:
+        assert analyzer._fallback_tone(text) == "friendly", text
+    assert analyzer._fallback_tone("I am so MAD right now") == "angry"
+    assert analyzer._fallback_tone("Sorry, I cry a lot") == "sad"
+
+def test_clean_improved_text():
+    """Test that case-only copies and too-short rewrites fall back to the original"""
+    analyzer = ToneAnalyzer()
+    text = "hello there friend"
+    
+    assert analyzer._clean_improved_text(text, "  Hello there, friend.  ") == "Hello there, friend."
+    assert analyzer._clean_improved_text(text, "HELLO THERE FRIEND") == text
+    assert analyzer._clean_improved_text(text, "Hi") == text